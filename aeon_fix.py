@@ -2,16 +2,36 @@ import subprocess
 import json
 import re
 import os
+import atexit
 import platform
 import datetime
 import sys
 import time
 import shutil
+import gzip
+import sqlite3
+import hashlib
+import queue
+import threading
+import copy
+import bisect
+import heapq
+from operator import itemgetter
+from collections import deque, defaultdict, Counter
 from typing import List, Dict, Any, Optional, Tuple, Union # Ensure typing imports are present
 import traceback
 import shlex # Ensure shlex is imported
 import webbrowser # Ensure webbrowser is imported
-from PIL import ImageGrab
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Let a locally spawned Ollama server handle the overlapping requests that
+# ask_llm_many issues; without this the daemon serializes them. Only takes
+# effect for a server started from this environment -- an already running
+# daemon keeps its own setting.
+os.environ.setdefault("OLLAMA_NUM_PARALLEL", "4")
 
 # Optional imports - will be checked at runtime
 try:
@@ -20,11 +40,17 @@ try:
 except ImportError:
     OLLAMA_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 try:
     from rich.console import Console
     from rich.table import Table
     from rich.panel import Panel
-    from rich.prompt import Prompt, Confirm
+    from rich.prompt import Prompt, Confirm, IntPrompt
     from rich.text import Text
     from rich.markdown import Markdown
     RICH_AVAILABLE = True
@@ -32,51 +58,204 @@ except ImportError:
     RICH_AVAILABLE = False
     Confirm = None # Define Confirm as None if rich is not available
 
+# platform.system() probes uname/the registry on every call; the answer is
+# fixed for the process lifetime, so resolve it once at import.
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM == "Windows"
+_IS_LINUX = _SYSTEM == "Linux"
+
 # Configuration
 CONFIG = {
     "memory_file": "assistant_memory.json",
-    "log_file": "pc_fix_logs.json",
+    "log_file": "pc_fix_logs.jsonl",
+    "llm_cache_file": "llm_cache.sqlite3",
+    "llm_cache_ttl": 7 * 24 * 3600, # Seconds before a cached LLM response expires
+    "log_rotate_bytes": 5 * 1024 * 1024, # Rotate+compress the log past this size
     "ollama_host": "http://localhost:11434",
+    "debug": bool(os.environ.get("AEON_FIX_DEBUG")), # Extra tracebacks when set
+    # Context-aware regex patterns, not plain substrings: word boundaries
+    # and argument shapes keep "format" inside an ordinary word or a flag
+    # from tripping the scanner while real destructive invocations still do.
     "dangerous_commands": [
-        "rm -rf", "deltree", "format", "dd if=", "mkfs",
-        "del /", "rd /s", "rmdir /s", ":(){:|:&};:"
+        r"\brm\s+-[a-z]*(?:rf|fr)[a-z]*\b",
+        r"\bdeltree\b",
+        r"\bformat\s+[a-z]:",
+        r"\bdd\s+if=",
+        r"\bmkfs(?:\.\w+)?\b",
+        r"\bdel\s+/",
+        r"\brd\s+/s\b",
+        r"\brmdir\s+/s\b",
+        r"\bchkdsk\b.*\s/(?:f|r)\b", # Repair-mode chkdsk modifies the disk
+        re.escape(":(){:|:&};:"),
     ],
-    "safe_diagnostic_commands": [
-        "wmic", "systeminfo", "ipconfig", "netstat", "tasklist",
-        "sfc", "dism", "chkdsk", "dir", "powercfg", "msinfo32",
-        "driverquery", "where", "regsvr32", "mdsched.exe" # Added some more
-    ]
+    # Safe diagnostics mapped to a per-command policy. Membership stays an
+    # O(1) hashed lookup, and flag rules live next to the command they
+    # govern instead of as hardcoded branches in is_dangerous_command.
+    "safe_diagnostic_commands": {
+        "wmic": {}, "systeminfo": {}, "ipconfig": {}, "netstat": {},
+        "tasklist": {}, "sfc": {}, "dism": {},
+        "chkdsk": {"forbidden_flags": frozenset({"/f", "/r"})}, # Repair flags modify the disk
+        "dir": {}, "powercfg": {}, "msinfo32": {}, "driverquery": {},
+        "where": {}, "regsvr32": {}, "mdsched.exe": {} # Added some more
+    }
 }
 
+# Precompiled union over the dangerous-command patterns: a single C-level
+# scan of the command string replaces a Python loop over every pattern.
+_DANGEROUS_RE = re.compile(
+    "|".join(CONFIG["dangerous_commands"]), re.IGNORECASE
+)
+
 # Initialize console
 if RICH_AVAILABLE:
     console = Console()
-    def print_info(message): console.print(f"[bold blue]INFO:[/bold blue] {message}")
-    def print_success(message): console.print(f"[bold green]SUCCESS:[/bold green] {message}")
-    def print_warning(message): console.print(f"[bold yellow]WARNING:[/bold yellow] {message}")
-    def print_error(message): console.print(f"[bold red]ERROR:[/bold red] {message}")
-    def print_md(md_text): console.print(Markdown(md_text))
-else:
-    # Basic print functions if rich is not available
-    def print_info(message): print(f"INFO: {message}")
-    def print_success(message): print(f"SUCCESS: {message}")
-    def print_warning(message): print(f"WARNING: {message}")
-    def print_error(message): print(f"ERROR: {message}")
-    def print_md(md_text): print(md_text) # Basic print for markdown text
-
-# Initialize LLM client if available
-llm_client = None # Initialize to None
-if OLLAMA_AVAILABLE:
+
+# =============================================================================
+# LLM Response Cache (exact-match, persisted to SQLite)
+# =============================================================================
+
+class LLMCache:
+    """Exact-match cache for LLM responses keyed on (model, messages)."""
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        # The client is shared across worker threads (batched queries, the
+        # background analysis pool, the stepwise report executor), but a
+        # default sqlite3 connection refuses use outside its creating thread
+        # -- every threaded get/put would raise and be swallowed, silently
+        # disabling the cache on exactly the hot paths. Allow cross-thread
+        # use and serialize statements with a lock, since the connection
+        # object itself is not thread-safe.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, ts REAL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]]) -> str:
+        payload = _json_dumps({"model": model, "messages": messages})
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, ts FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, ts = row
+            if time.time() - ts > self.ttl: # Expired entry
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self.conn.commit()
+
+
+class CachedLLMClient:
+    """Proxy around ollama.Client that serves repeated chat() calls from cache.
+
+    Cache hits return in milliseconds instead of re-running local inference;
+    misses fall through to the real client and are stored for next time.
+    """
+
+    def __init__(self, client, cache: LLMCache):
+        self._client = client
+        self._cache = cache
+
+    def chat(self, model: str, messages: List[Dict[str, Any]], **kwargs):
+        key = LLMCache.make_key(model, messages)
+        try:
+            cached = self._cache.get(key)
+        except Exception:
+            cached = None # A broken cache must never block inference
+        if cached is not None:
+            return {"message": {"content": cached}}
+
+        response = self._client.chat(model=model, messages=messages, **kwargs)
+        try:
+            self._cache.put(key, response["message"]["content"])
+        except Exception:
+            pass
+        return response
+
+    def chat_stream(self, model: str, messages: List[Dict[str, Any]], **kwargs):
+        """Yield response text incrementally; cache hits arrive as one piece.
+
+        On a miss the underlying client streams token chunks and the joined
+        text is stored once the stream completes, so streaming callers share
+        the same cache as chat().
+        """
+        key = LLMCache.make_key(model, messages)
+        try:
+            cached = self._cache.get(key)
+        except Exception:
+            cached = None # A broken cache must never block inference
+        if cached is not None:
+            yield cached
+            return
+
+        pieces: List[str] = []
+        for part in self._client.chat(model=model, messages=messages,
+                                      stream=True, **kwargs):
+            token = part.get("message", {}).get("content", "")
+            if token:
+                pieces.append(token)
+                yield token
+        try:
+            self._cache.put(key, "".join(pieces))
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        # Everything except chat() (list, pull, ...) goes straight through
+        return getattr(self._client, name)
+
+
+# LLM client is created lazily: the first actual LLM call pays the connect
+# cost, so runs that never touch the LLM skip it entirely.
+@lru_cache(maxsize=1)
+def get_llm_client() -> Optional["CachedLLMClient"]:
+    """Initialize and memoize the Ollama client, or None if unavailable."""
+    if not OLLAMA_AVAILABLE:
+        return None
     try:
-        llm_client = Client(host=CONFIG["ollama_host"])
+        return CachedLLMClient(
+            Client(host=CONFIG["ollama_host"]),
+            LLMCache(CONFIG["llm_cache_file"], CONFIG["llm_cache_ttl"])
+        )
     except Exception as e:
         print_error(f"Failed to initialize Ollama client: {e}")
-        OLLAMA_AVAILABLE = False
+        return None
 
 # =============================================================================
 # Enhanced Rich UI/UX Utilities (with Emojis & Animation)
 # =============================================================================
 
+# Piped/redirected output goes through sys.stdout's own block buffer (already
+# ~8KB when not a tty), so the plain-text fast paths skip Rich rendering but
+# share one buffer with the bare print()/input() call sites -- a separate
+# module-level buffer would reorder lines against direct writes and could
+# leave text unflushed while input() blocks. input() flushes stdout before
+# reading, so prompt ordering comes for free.
+
+def _flush_plain() -> None:
+    sys.stdout.flush()
+
+def _plain_write(text: str) -> None:
+    sys.stdout.write(text)
+
+atexit.register(_flush_plain)
+
 if RICH_AVAILABLE:
     from rich.progress import Progress, SpinnerColumn, TextColumn
     from rich.live import Live
@@ -91,18 +270,53 @@ if RICH_AVAILABLE:
     EMOJI_INPUT = "📝"
     EMOJI_LLM = "🤖"
 
+    # Markup heads are constant per level; build them once instead of per call.
+    _INFO_HEAD = f"{EMOJI_INFO} [bold blue]INFO:[/bold blue] "
+    _SUCCESS_HEAD = f"{EMOJI_SUCCESS} [bold green]SUCCESS:[/bold green] "
+    _WARNING_HEAD = f"{EMOJI_WARNING} [bold yellow]WARNING:[/bold yellow] "
+    _ERROR_HEAD = f"{EMOJI_ERROR} [bold red]ERROR:[/bold red] "
+    _STEP_HEAD = f"{EMOJI_STEP} Step"
+
+    # Status lines are the hot print path; a styled line avoids Panel's layout
+    # pass (measure + box drawing), which costs several times a plain print.
     def print_info(message):
-        console.print(Panel(f"{EMOJI_INFO} [bold blue]INFO:[/bold blue]\n{message}", border_style="blue", expand=False, padding=(0,2)))
+        if not console.is_terminal: # Piped/redirected output: skip Rich rendering
+            _plain_write(f"INFO: {message}\n")
+            return
+        console.print(_INFO_HEAD + str(message), soft_wrap=True)
     def print_success(message):
-        console.print(Panel(f"{EMOJI_SUCCESS} [bold green]SUCCESS:[/bold green]\n{message}", border_style="green", expand=False, padding=(0,2)))
+        if not console.is_terminal:
+            _plain_write(f"SUCCESS: {message}\n")
+            return
+        console.print(_SUCCESS_HEAD + str(message), soft_wrap=True)
     def print_warning(message):
-        console.print(Panel(f"{EMOJI_WARNING} [bold yellow]WARNING:[/bold yellow]\n{message}", border_style="yellow", expand=False, padding=(0,2)))
+        if not console.is_terminal:
+            _plain_write(f"WARNING: {message}\n")
+            return
+        console.print(_WARNING_HEAD + str(message), soft_wrap=True)
     def print_error(message):
-        console.print(Panel(f"{EMOJI_ERROR} [bold red]ERROR:[/bold red]\n{message}", border_style="red", expand=False, padding=(0,2)))
+        if not console.is_terminal:
+            _plain_write(f"ERROR: {message}\n")
+            return
+        console.print(_ERROR_HEAD + str(message), soft_wrap=True)
+
+    # Boxed variants for the rare places that want the full Panel treatment.
+    def print_info_boxed(message):
+        console.print(Panel(f"{_INFO_HEAD}\n{message}", border_style="blue", expand=False, padding=(0,2)))
+    def print_success_boxed(message):
+        console.print(Panel(f"{_SUCCESS_HEAD}\n{message}", border_style="green", expand=False, padding=(0,2)))
+    def print_warning_boxed(message):
+        console.print(Panel(f"{_WARNING_HEAD}\n{message}", border_style="yellow", expand=False, padding=(0,2)))
+    def print_error_boxed(message):
+        console.print(Panel(f"{_ERROR_HEAD}\n{message}", border_style="red", expand=False, padding=(0,2)))
     def print_md(md_text):
+        if not console.is_terminal:
+            _plain_write(md_text + "\n")
+            return
         console.print(Panel(Markdown(md_text), border_style="magenta", expand=False, padding=(0,2)))
 
     def print_user_input(prompt: str) -> str:
+        _flush_plain() # Prompt echo must not race buffered output
         return Prompt.ask(Panel(f"{EMOJI_INPUT} [bold cyan]{prompt}[/bold cyan]", border_style="cyan", expand=False, padding=(0,2)))
 
     def print_choices(title: str, choices: list) -> int:
@@ -115,7 +329,7 @@ if RICH_AVAILABLE:
         return int(Prompt.ask("Select an option", choices=[str(i) for i in range(1, len(choices)+1)])) - 1
 
     def print_step(title: str, step: str, number: int = None, total: int = None):
-        label = f"{EMOJI_STEP} Step {number}/{total}" if number and total else f"{EMOJI_STEP} Step"
+        label = f"{_STEP_HEAD} {number}/{total}" if number and total else _STEP_HEAD
         console.print(Panel(f"[bold yellow]{label}: {title}[/bold yellow]\n{step}", border_style="yellow", expand=False, padding=(0,2)))
 
     def print_section(title: str, content: str):
@@ -137,6 +351,11 @@ else:
     def print_success(message): print(f"\nSUCCESS: {message}\n" + "-"*60)
     def print_warning(message): print(f"\nWARNING: {message}\n" + "-"*60)
     def print_error(message): print(f"\nERROR: {message}\n" + "-"*60)
+    # No boxes without Rich; boxed variants fall back to the plain printers.
+    print_info_boxed = print_info
+    print_success_boxed = print_success
+    print_warning_boxed = print_warning
+    print_error_boxed = print_error
     def print_md(md_text): print("\n" + md_text + "\n" + "-"*60)
     def print_user_input(prompt: str) -> str:
         return input(f"{prompt}\n> ")
@@ -167,13 +386,17 @@ else:
 
 def save_clipboard_image():
     """Check clipboard for image, save to ./screenshots, return path or None."""
+    from PIL import ImageGrab # Imported here so startup doesn't pay for PIL
     img = ImageGrab.grabclipboard()
     if img is not None:
         folder = os.path.join(os.getcwd(), "screenshots")
-        os.makedirs(folder, exist_ok=True)
+        if not os.path.isdir(folder): # Skip the syscall once the folder exists
+            os.makedirs(folder, exist_ok=True)
         filename = f"screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
         path = os.path.join(folder, filename)
-        img.save(path, 'PNG')
+        # These files only live long enough to feed the vision LLM, so encode
+        # speed matters and compression ratio doesn't.
+        img.save(path, 'PNG', compress_level=1, optimize=False)
         print_success(f"Screenshot saved: {path}")
         return path
     else:
@@ -182,16 +405,56 @@ def save_clipboard_image():
 
 
 
+# =============================================================================
+# JSON Serialization Helpers (orjson when available, stdlib json otherwise)
+# =============================================================================
+
+if ORJSON_AVAILABLE:
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 bytes using orjson (Rust-backed, much faster)."""
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS if indent else orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=option)
+
+    def _json_loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+else:
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        # Compact separators in the non-indented case: log records and cache
+        # keys don't need the default padding, which costs ~10% size and a
+        # proportional amount of serializer time (orjson is always compact).
+        return json.dumps(obj, indent=2 if indent else None,
+                          separators=None if indent else (',', ':'),
+                          ensure_ascii=False).encode('utf-8')
+
+    def _json_loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
 # =============================================================================
 # Memory Management Functions
 # =============================================================================
 
+# Parsed-memory cache keyed on (mtime_ns, size): reloading in the same session
+# skips the re-read and re-parse when the file on disk hasn't changed. The
+# atomic replace in _write_memory keeps the stat key trustworthy.
+_memory_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+
 def load_memory() -> Dict[str, Any]:
     """Load persistent memory from file or initialize if it doesn't exist."""
+    global _memory_cache
+    # Flush any debounced write first: a load inside the debounce window
+    # would otherwise return the stale on-disk state, and a caller saving
+    # that stale dict would replace the pending update and silently drop it.
+    flush_memory()
     try:
         if os.path.exists(CONFIG["memory_file"]):
-            with open(CONFIG["memory_file"], "r", encoding='utf-8') as f: # Added encoding
-                return json.load(f)
+            st = os.stat(CONFIG["memory_file"])
+            key = (st.st_mtime_ns, st.st_size)
+            if _memory_cache is not None and _memory_cache[0] == key:
+                return copy.deepcopy(_memory_cache[1])
+            with open(CONFIG["memory_file"], "rb") as f: # Bytes mode, decoder handles UTF-8
+                memory = _json_loads(f.read())
+            _memory_cache = (key, copy.deepcopy(memory))
+            return memory
     except Exception as e:
         print_error(f"Error loading memory: {e}")
 
@@ -203,14 +466,47 @@ def load_memory() -> Dict[str, Any]:
         "command_history": []
     }
 
-def save_memory(memory: Dict[str, Any]) -> None:
-    """Save persistent memory to file."""
+# Debounce state for memory writes: callers invoke save_memory after every
+# mutation (sometimes several times per command), so the actual disk write is
+# coalesced to at most one per interval, with a guaranteed flush at exit.
+_MEMORY_FLUSH_INTERVAL = 2.0 # Seconds between on-disk flushes
+_pending_memory: Optional[Dict[str, Any]] = None
+_last_memory_flush = 0.0
+
+def _write_memory(memory: Dict[str, Any]) -> None:
+    """Write memory to disk atomically (write temp file, fsync, rename)."""
     try:
-        with open(CONFIG["memory_file"], "w", encoding='utf-8') as f: # Added encoding
-            json.dump(memory, f, indent=2, ensure_ascii=False) # Added ensure_ascii=False
+        # Bounded histories are held as deques in memory; keep the on-disk
+        # format as plain JSON lists.
+        data = {k: list(v) if isinstance(v, deque) else v for k, v in memory.items()}
+        # Write-then-rename so a crash mid-write can't truncate the live file
+        tmp_path = f"{CONFIG['memory_file']}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f: # Bytes mode, serializer emits UTF-8
+            f.write(_json_dumps(data, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONFIG["memory_file"])
     except Exception as e:
         print_error(f"Error saving memory: {e}")
 
+def flush_memory() -> None:
+    """Flush any pending memory state to disk."""
+    global _pending_memory, _last_memory_flush
+    if _pending_memory is None:
+        return
+    _write_memory(_pending_memory)
+    _pending_memory = None
+    _last_memory_flush = time.monotonic()
+
+atexit.register(flush_memory)
+
+def save_memory(memory: Dict[str, Any]) -> None:
+    """Save persistent memory, debouncing rapid consecutive writes."""
+    global _pending_memory
+    _pending_memory = memory
+    if time.monotonic() - _last_memory_flush >= _MEMORY_FLUSH_INTERVAL:
+        flush_memory()
+
 def update_memory(memory: Dict[str, Any], key: str, value: Any) -> Dict[str, Any]:
     """Update a specific key in memory."""
     memory[key] = value
@@ -219,16 +515,15 @@ def update_memory(memory: Dict[str, Any], key: str, value: Any) -> Dict[str, Any
 
 def add_to_memory_list(memory: Dict[str, Any], key: str, value: Any,
                        max_items: int = 20) -> Dict[str, Any]: # Increased max_items slightly
-    """Add an item to a list in memory with a maximum size limit."""
-    if key not in memory or not isinstance(memory[key], list):
-        memory[key] = []
+    """Add an item to a bounded history in memory (newest first)."""
+    # Back the history with a deque: O(1) prepend and automatic trimming,
+    # instead of list.insert(0, ...) + slicing which are both O(N).
+    dq = memory.get(key)
+    if not isinstance(dq, deque):
+        dq = deque(dq if isinstance(dq, list) else [], maxlen=max_items)
+        memory[key] = dq
 
-    # Add new item at the beginning
-    memory[key].insert(0, value)
-
-    # Trim list if it exceeds max size
-    if len(memory[key]) > max_items:
-        memory[key] = memory[key][:max_items]
+    dq.appendleft(value)
 
     save_memory(memory)
     return memory
@@ -237,74 +532,189 @@ def add_to_memory_list(memory: Dict[str, Any], key: str, value: Any,
 # Logging Functions
 # =============================================================================
 
+# Same-second cache for timestamp formatting: constructing a datetime and
+# walking isoformat() per entry is needlessly heavy for high-frequency logging.
+_ts_cache: Tuple[int, str] = (0, "")
+
+def _now_iso() -> str:
+    """ISO-8601 local timestamp with microseconds, cheap on repeated calls."""
+    global _ts_cache
+    ts = time.time()
+    sec = int(ts)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{int((ts % 1) * 1e6):06d}"
+
+# Log writes happen on a background thread so callers (command execution, LLM
+# loops) never block on disk; entries are batched into one write per drain.
+_log_queue: "queue.Queue[bytes]" = queue.Queue()
+_log_writer: Optional[threading.Thread] = None
+
+def _maybe_rotate_log() -> None:
+    """Compress and archive the log file once it grows past the size cap.
+
+    Keeps the live JSONL small (fast appends and reads) while history stays
+    available as gzip archives next to it.
+    """
+    try:
+        if os.path.getsize(CONFIG["log_file"]) < CONFIG["log_rotate_bytes"]:
+            return
+    except OSError: # Log file doesn't exist yet
+        return
+    archive = CONFIG["log_file"] + time.strftime(".%Y%m%d%H%M%S.gz")
+    try:
+        with open(CONFIG["log_file"], "rb") as src, \
+                gzip.open(archive, "wb", compresslevel=3) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(CONFIG["log_file"])
+    except Exception as e:
+        print_error(f"Error rotating log file: {e}")
+
+def _log_writer_loop() -> None:
+    while True:
+        pending = [_log_queue.get()] # Block for the first entry
+        while True: # Then drain whatever else queued up meanwhile
+            try:
+                pending.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _maybe_rotate_log()
+            with open(CONFIG["log_file"], "ab") as f:
+                f.write(b"".join(pending))
+        except Exception as e:
+            print_error(f"Error writing to log file: {e}")
+        for _ in pending:
+            _log_queue.task_done()
+
+def _flush_logs() -> None:
+    """Block until all queued log entries have been written."""
+    if _log_writer is not None:
+        _log_queue.join()
+
+atexit.register(_flush_logs)
+
 def log_action(action_type: str, details: Dict[str, Any], success: bool = True) -> None:
-    """Log an action to the structured log file."""
+    """Log an action to the structured log file (JSON Lines, one entry per line)."""
+    global _log_writer
     log_entry = {
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "action_type": action_type,
         "success": success,
         "details": details
     }
 
-    # Load existing logs or create empty list
-    logs = []
-    try:
-        if os.path.exists(CONFIG["log_file"]):
-            with open(CONFIG["log_file"], "r", encoding='utf-8') as f: # Added encoding
-                logs = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError): # More specific error handling
-        pass # Ignore if file not found or empty/corrupt
-    except Exception as e:
-        print_error(f"Error reading log file (will overwrite if saving succeeds): {e}")
+    if _log_writer is None:
+        _log_writer = threading.Thread(target=_log_writer_loop, daemon=True,
+                                       name="aeon-log-writer")
+        _log_writer.start()
 
+    _log_queue.put(_json_dumps(log_entry) + b"\n")
 
-    # Add new entry and save
-    logs.append(log_entry)
+def iter_logs():
+    """Yield parsed log entries from the JSONL log file, skipping malformed lines."""
     try:
-        with open(CONFIG["log_file"], "w", encoding='utf-8') as f: # Added encoding
-            json.dump(logs, f, indent=2, ensure_ascii=False) # Added ensure_ascii=False
+        with open(CONFIG["log_file"], "r", encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _json_loads(line)
+                except ValueError:
+                    continue # Skip corrupt/partial lines
+    except FileNotFoundError:
+        return
     except Exception as e:
-        print_error(f"Error writing to log file: {e}")
+        print_error(f"Error reading log file: {e}")
 
 # =============================================================================
 # System Information Functions
 # =============================================================================
 
-def get_os_info() -> Dict[str, str]:
-    """Get basic operating system information."""
-    info = {
-        "system": platform.system(),
+@lru_cache(maxsize=None)
+def get_system_info() -> Dict[str, str]:
+    """Invariant platform facts, resolved once per process.
+
+    Each platform.* call hits OS APIs (uname / the registry); the answers
+    cannot change while we're running, so cache them forever.
+    """
+    return {
+        "system": _SYSTEM,
         "version": platform.version(),
         "release": platform.release(),
         "architecture": platform.machine()
     }
 
+@lru_cache(maxsize=None)
+def which_cached(cmd: str) -> Optional[str]:
+    """Memoized shutil.which(); PATH lookups don't change mid-session."""
+    return shutil.which(cmd)
+
+@lru_cache(maxsize=1)
+def get_os_info() -> Dict[str, str]:
+    """Get basic operating system information.
+
+    Cached for the process lifetime: the systeminfo/os-release probes behind
+    this cost seconds of subprocess wait and their answers don't change.
+    """
+    info = dict(get_system_info())
+
     # Add more Windows-specific information
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         try:
-            # Using windows-specific commands
-            # Note: run_command should be defined before this is called
-            result = run_command(["systeminfo", "/FO", "LIST"], capture_output=True, shell=False,
-                                 require_confirmation=False)
-            if result["success"] and result["output"]:
-                output = result["output"]
-                # Extract OS Name, Version, etc. from systeminfo output
-                for line in output.splitlines():
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        key = key.strip()
-                        value = value.strip()
-
-                        if key in ["OS Name", "OS Version", "System Manufacturer",
-                                   "System Model", "System Type", "Total Physical Memory", "System Locale"]: # Added locale
-                            info[key] = value
-            else:
-                print_warning(f"systeminfo command failed or produced no output. Error: {result.get('error','')}")
+            # systeminfo.exe can take 10+ seconds on some hosts; the handful
+            # of fields we keep all come from the registry and Win32 APIs in
+            # milliseconds instead.
+            import winreg
+            import ctypes
+
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
+                                r"SOFTWARE\Microsoft\Windows NT\CurrentVersion") as reg_key:
+                def _reg_value(name):
+                    try:
+                        return winreg.QueryValueEx(reg_key, name)[0]
+                    except OSError:
+                        return None
+
+                product_name = _reg_value("ProductName")
+                display_version = _reg_value("DisplayVersion") or _reg_value("ReleaseId")
+                build = _reg_value("CurrentBuild")
+                if product_name:
+                    info["OS Name"] = f"Microsoft {product_name}"
+                if display_version or build:
+                    info["OS Version"] = " ".join(
+                        part for part in (display_version, f"Build {build}" if build else None) if part
+                    )
+
+            class _MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            mem_status = _MEMORYSTATUSEX()
+            mem_status.dwLength = ctypes.sizeof(_MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(mem_status)):
+                info["Total Physical Memory"] = f"{mem_status.ullTotalPhys // (1024 * 1024):,} MB"
+
+            # Manufacturer/model ride along with the cached CIM hardware batch
+            computer_system = get_hardware_info().get("ComputerSystem", {})
+            for src_key, dst_key in (("Manufacturer", "System Manufacturer"),
+                                     ("Model", "System Model"),
+                                     ("SystemType", "System Type")):
+                if computer_system.get(src_key):
+                    info[dst_key] = computer_system[src_key]
         except Exception as e:
-            print_error(f"Error getting Windows-specific info via systeminfo: {e}")
+            print_error(f"Error getting Windows-specific info via registry/Win32: {e}")
 
     # Add more Linux-specific information
-    elif platform.system() == "Linux":
+    elif _IS_LINUX:
         try:
             # Getting Linux distribution info
             # Use platform.freedesktop_os_release() if available
@@ -312,118 +722,128 @@ def get_os_info() -> Dict[str, str]:
                 distro_info = platform.freedesktop_os_release()
                 info["distribution"] = distro_info.get("PRETTY_NAME", distro_info.get("NAME", "Unknown"))
                 info["distribution_version"] = distro_info.get("VERSION_ID", "Unknown")
-            # Fallback using os-release file
+            # Fallback using os-release file (single read, then scan)
             elif os.path.exists("/etc/os-release"):
-                 with open("/etc/os-release", "r") as f:
-                     for line in f:
-                         if line.startswith("PRETTY_NAME="):
-                             info["distribution"] = line.split("=",1)[1].strip().strip('"')
-                         elif line.startswith("VERSION_ID="):
-                             info["distribution_version"] = line.split("=",1)[1].strip().strip('"')
-
-            # Getting memory info from /proc/meminfo
+                 with open("/etc/os-release", "rb") as f:
+                     os_release = f.read()
+                 for line in os_release.splitlines():
+                     if line.startswith(b"PRETTY_NAME="):
+                         info["distribution"] = line.split(b"=",1)[1].strip().strip(b'"').decode()
+                     elif line.startswith(b"VERSION_ID="):
+                         info["distribution_version"] = line.split(b"=",1)[1].strip().strip(b'"').decode()
+
+            # Getting memory info from /proc/meminfo: read the file whole in
+            # one syscall (a consistent kernel-side snapshot), then scan for
+            # the MemTotal line without per-line text decoding.
             if os.path.exists("/proc/meminfo"):
-                with open("/proc/meminfo", "r") as f:
-                    for line in f:
-                        if "MemTotal" in line:
-                            info["Total Physical Memory"] = line.split(":", 1)[1].strip()
-                            break
+                with open("/proc/meminfo", "rb") as f:
+                    meminfo = f.read(8192)
+                for line in meminfo.splitlines():
+                    if line.startswith(b"MemTotal:"):
+                        info["Total Physical Memory"] = line.split(b":", 1)[1].strip().decode()
+                        break
         except Exception as e:
             print_error(f"Error getting Linux-specific info: {e}")
 
     return info
 
+@lru_cache(maxsize=1)
 def get_hardware_info() -> Dict[str, Any]:
-    """Get hardware information using platform-specific commands."""
+    """Get hardware information using platform-specific commands.
+
+    Cached for the process lifetime; CPU/disk/board identity is fixed, so
+    repeat reports skip the WMIC/lsblk fan-out entirely.
+    """
     info = {}
 
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         try:
-            # Using wmic to get CPU information
-            result = run_command(["wmic", "cpu", "get", "Name,NumberOfCores,NumberOfLogicalProcessors", "/format:list"],
-                                capture_output=True, shell=False, require_confirmation=False)
+            # One PowerShell batch instead of three WMIC spawns: WMIC is
+            # deprecated, and each spawn alone costs a few hundred ms of
+            # interpreter startup before the query even runs.
+            ps_script = (
+                "@{"
+                "cpu = Get-CimInstance Win32_Processor | Select-Object Name,NumberOfCores,NumberOfLogicalProcessors; "
+                "disks = @(Get-CimInstance Win32_DiskDrive | Select-Object Model,Size,Status,InterfaceType); "
+                "mb = Get-CimInstance Win32_BaseBoard | Select-Object Product,Manufacturer,Version; "
+                "cs = Get-CimInstance Win32_ComputerSystem | Select-Object Manufacturer,Model,SystemType"
+                "} | ConvertTo-Json -Depth 4 -Compress"
+            )
+            result = run_powershell(ps_script)
             if result["success"] and result["output"]:
-                cpu_info = {}
-                for line in result["output"].splitlines():
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        # Standardize keys slightly
-                        key_std = key.strip().replace("NumberOf", "Num")
-                        cpu_info[key_std] = value.strip()
-                info["CPU"] = cpu_info # Nest under CPU key
-            else:
-                 print_warning(f"WMIC CPU query failed or produced no output. Error: {result.get('error','')}")
-
-            # Using wmic to get disk information
-            result = run_command(["wmic", "diskdrive", "get", "Model,Size,Status,InterfaceType", "/format:list"], # Added InterfaceType
-                                capture_output=True, shell=False, require_confirmation=False)
-            if result["success"] and result["output"]:
-                disks = []
-                disk = {}
-                for line in result["output"].splitlines():
-                    line = line.strip()
-                    if not line: # Check for blank line separator
-                        if disk: # Append disk info if we collected any
-                            disks.append(disk)
-                        disk = {} # Reset for next disk
-                    elif "=" in line:
-                        key, value = line.split("=", 1)
-                        disk[key.strip()] = value.strip()
-                if disk: # Append the last disk if any info was found
-                    disks.append(disk)
-                info["Disks"] = disks
-            else:
-                print_warning(f"WMIC DiskDrive query failed or produced no output. Error: {result.get('error','')}")
-
-            # Using wmic to get Baseboard (Motherboard) info
-            result = run_command(["wmic", "baseboard", "get", "Product,Manufacturer,Version", "/format:list"],
-                                capture_output=True, shell=False, require_confirmation=False)
-            if result["success"] and result["output"]:
-                 mb_info = {}
-                 for line in result["output"].splitlines():
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        mb_info[key.strip()] = value.strip()
-                 info["Motherboard"] = mb_info
+                try:
+                    hw = _json_loads(result["output"])
+
+                    # ConvertTo-Json collapses single-element results to a
+                    # bare object, so normalize each section's shape first.
+                    cpu = hw.get("cpu") or {}
+                    if isinstance(cpu, list):
+                        cpu = cpu[0] if cpu else {}
+                    info["CPU"] = {
+                        "Name": (cpu.get("Name") or "").strip(),
+                        "NumCores": cpu.get("NumberOfCores"),
+                        "NumLogicalProcessors": cpu.get("NumberOfLogicalProcessors"),
+                    }
+
+                    disks = hw.get("disks") or []
+                    if isinstance(disks, dict):
+                        disks = [disks]
+                    info["Disks"] = [{
+                        "Model": d.get("Model", "N/A"),
+                        "Size": d.get("Size", "N/A"),
+                        "Status": d.get("Status", "N/A"),
+                        "InterfaceType": d.get("InterfaceType", "N/A"),
+                    } for d in disks]
+
+                    mb = hw.get("mb") or {}
+                    if isinstance(mb, list):
+                        mb = mb[0] if mb else {}
+                    info["Motherboard"] = {k: mb.get(k, "N/A") for k in ("Product", "Manufacturer", "Version")}
+
+                    cs = hw.get("cs") or {}
+                    if isinstance(cs, list):
+                        cs = cs[0] if cs else {}
+                    info["ComputerSystem"] = {k: cs.get(k, "N/A") for k in ("Manufacturer", "Model", "SystemType")}
+                except json.JSONDecodeError:
+                    print_error("Error parsing hardware JSON from PowerShell")
             else:
-                print_warning(f"WMIC Baseboard query failed. Error: {result.get('error','')}")
+                print_warning(f"PowerShell hardware query failed or produced no output. Error: {result.get('error','')}")
 
         except Exception as e:
-            print_error(f"Error getting Windows hardware info via WMIC: {e}")
+            print_error(f"Error getting Windows hardware info via Get-CimInstance: {e}")
 
-    elif platform.system() == "Linux":
+    elif _IS_LINUX:
         try:
-            # Get CPU info from /proc/cpuinfo (simplified)
-            result = run_command(["grep", "-E", "^(model name|cpu cores)", "/proc/cpuinfo"],
-                                capture_output=True, shell=False, require_confirmation=False)
-            if result["success"] and result["output"]:
+            # Get CPU info from /proc/cpuinfo directly: one whole-file read
+            # gives a consistent snapshot and skips the fork+exec that the
+            # old `grep` pipeline paid just to filter a ~10KB file.
+            try:
+                with open("/proc/cpuinfo", "rb") as f:
+                    cpuinfo = f.read()
                 cpu_info = {}
                 model_name = ""
                 cores = 0
-                for line in result["output"].splitlines():
-                     key_val = line.split(":", 1)
-                     if len(key_val) == 2:
-                         key = key_val[0].strip()
-                         val = key_val[1].strip()
-                         if key == "model name" and not model_name: # Take first model name
-                             model_name = val
-                         elif key == "cpu cores":
-                             try:
-                                 cores += int(val) # Sum cores across potentially multiple entries
-                             except ValueError:
-                                 pass
+                for line in cpuinfo.splitlines():
+                     if line.startswith(b"model name"):
+                         if not model_name: # Take first model name
+                             model_name = line.split(b":", 1)[1].strip().decode()
+                     elif line.startswith(b"cpu cores"):
+                         try:
+                             cores += int(line.split(b":", 1)[1]) # Sum cores across potentially multiple entries
+                         except (ValueError, IndexError):
+                             pass
                 cpu_info["Name"] = model_name
                 cpu_info["NumCores"] = cores # Total physical cores reported
                 info["CPU"] = cpu_info
-            else:
-                 print_warning(f"Could not get CPU info from /proc/cpuinfo. Error: {result.get('error','')}")
+            except OSError as cpu_e:
+                 print_warning(f"Could not get CPU info from /proc/cpuinfo. Error: {cpu_e}")
 
             # Get disk info using lsblk
             result = run_command(["lsblk", "-d", "-b", "-o", "NAME,SIZE,MODEL,TYPE,TRAN", "--json"], # Added TYPE, TRAN (transport), -b (bytes)
                                 capture_output=True, shell=False, require_confirmation=False)
             if result["success"] and result["output"]:
                 try:
-                    disk_data = json.loads(result["output"])
+                    disk_data = _json_loads(result["output"])
                     # Format slightly for consistency
                     disks = []
                     for bd in disk_data.get("blockdevices", []):
@@ -445,11 +865,20 @@ def get_hardware_info() -> Dict[str, Any]:
 
     return info
 
+# Network state does drift (DHCP, VPNs, routes), so unlike the hardware/OS
+# probes it only gets a short TTL rather than a forever cache.
+_NET_INFO_TTL = 30.0
+_net_info_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
 def get_network_info() -> Dict[str, Any]:
-    """Get network configuration information."""
+    """Get network configuration information (cached for a short interval)."""
+    global _net_info_cache
+    now = time.time()
+    if _net_info_cache is not None and now - _net_info_cache[0] < _NET_INFO_TTL:
+        return _net_info_cache[1]
     info = {}
 
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         try:
             result = run_command(["ipconfig", "/all"],
                                 capture_output=True, shell=False, require_confirmation=False)
@@ -460,7 +889,7 @@ def get_network_info() -> Dict[str, Any]:
         except Exception as e:
             print_error(f"Error getting Windows network info (ipconfig): {e}")
 
-    elif platform.system() == "Linux":
+    elif _IS_LINUX:
         try:
             result = run_command(["ip", "-br", "-c", "addr"], # Brief, colorized address view
                                 capture_output=True, shell=False, require_confirmation=False)
@@ -488,23 +917,54 @@ def get_network_info() -> Dict[str, Any]:
         except Exception as e:
             print_error(f"Error getting Linux network info: {e}")
 
+    _net_info_cache = (now, info)
     return info
 
+def _parse_log_ts(ts_str: str) -> datetime.datetime:
+    """Best-effort timestamp parse shared by the log ordering/bucketing code.
+
+    Attempts ISO format first, then the journalctl plain-text shape
+    ("Month Day HH:MM:SS"); unparseable values sort first.
+    """
+    try:
+        return datetime.datetime.fromisoformat(ts_str)
+    except ValueError:
+        try:
+            return datetime.datetime.strptime(ts_str, '%b %d %H:%M:%S').replace(year=datetime.datetime.now().year)
+        except ValueError:
+            return datetime.datetime.min
+
+def _tail_lines(path: str, nbytes: int = 65536) -> List[str]:
+    """Return the decoded last lines of a file by seeking to its tail block.
+
+    Avoids forking a `tail` process and never reads more than nbytes no
+    matter how large the log file has grown.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        os.lseek(fd, max(0, size - nbytes), os.SEEK_SET)
+        buf = os.read(fd, nbytes)
+    finally:
+        os.close(fd)
+    return buf.decode(errors="replace").splitlines()
+
 def collect_system_logs(max_logs: int = 50) -> List[Dict[str, Any]]:
     """Collect recent system logs (Windows Event logs or Linux system logs)."""
     logs = []
 
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         try:
             # Use f-string - it handles doubled {{ }} correctly for PowerShell's literal braces
+            # FilterHashtable filters server-side (faster than XPath), events
+            # already arrive newest-first so no Sort-Object materialization,
+            # and Message is truncated to 4KB before it ever hits the JSON.
             powershell_script = f"""
             $ErrorActionPreference = 'SilentlyContinue' # Suppress PS errors if logs are inaccessible
-            # Select properties needed, including the necessary calculated properties for JSON
-            $logs = Get-WinEvent -LogName System, Application -FilterXPath "*[System[(Level=1 or Level=2 or Level=3)]]" -MaxEvents {max_logs} |
+            $logs = Get-WinEvent -FilterHashtable @{{LogName='System','Application'; Level=1,2,3}} -MaxEvents {max_logs} |
                 Select-Object @{{Name='TimeCreated'; Expression={{$_.TimeCreated.ToString("o")}}}}, `
-                              ProviderName, Id, LevelDisplayName, Message, `
-                              @{{Name='Source'; Expression={{$_.ProviderName}}}} |
-                Sort-Object TimeCreated -Descending
+                              ProviderName, Id, LevelDisplayName, `
+                              @{{Name='Message'; Expression={{if($_.Message){{$_.Message.Substring(0,[Math]::Min(4096,$_.Message.Length))}}}}}}
 
             # Directly convert the selected objects to JSON - PowerShell handles message cleaning better this way
             # Use -Depth 5 to handle potentially nested messages
@@ -512,14 +972,13 @@ def collect_system_logs(max_logs: int = 50) -> List[Dict[str, Any]]:
             """
             # Removed the manual JSON building loop - ConvertTo-Json on the selected objects is cleaner
 
-            # Execute the PowerShell script
-            result = run_command(["powershell", "-NoProfile", "-Command", powershell_script],
-                                capture_output=True, shell=False, require_confirmation=False)
+            # Execute the PowerShell script in the long-lived host
+            result = run_powershell(powershell_script)
 
             if result["success"] and result["output"]:
                 try:
                     # Attempt to parse the JSON output directly
-                    logs_data = json.loads(result["output"])
+                    logs_data = _json_loads(result["output"])
                     # Ensure logs is always a list
                     if isinstance(logs_data, list):
                         logs = logs_data
@@ -547,40 +1006,46 @@ def collect_system_logs(max_logs: int = 50) -> List[Dict[str, Any]]:
             print_error(traceback.format_exc()) # Provide full traceback
    # --- End of NEW/Corrected Block ---
 
-    elif platform.system() == "Linux":
+    elif _IS_LINUX:
         try:
             # Use journalctl for systemd systems, fallback to common log files
-            if shutil.which("journalctl"):
+            if which_cached("journalctl"):
                 # Get recent errors (priority 0-3), no pager, JSON format if possible, limit count
-                # Try JSON output first
+                # Try JSON output first. journalctl emits one JSON object per
+                # line, so parse straight off the pipe: no whole-output
+                # capture, no intermediate list-of-lines, and parsing
+                # overlaps with journalctl still writing.
                 cmd = ["journalctl", "-p", "0..3", "--no-pager", "-n", str(max_logs), "-o", "json"]
-                result = run_command(cmd, capture_output=True, shell=False, require_confirmation=False)
-
-                if result["success"] and result["output"]:
-                    try:
-                        # journalctl json output is one JSON object per line
-                        log_lines = result["output"].strip().split('\n')
-                        for line in log_lines:
-                            try:
-                                log_entry = json.loads(line)
-                                # Extract relevant fields, map to consistent names
-                                logs.append({
-                                    "TimeCreated": datetime.datetime.fromtimestamp(int(log_entry.get("__REALTIME_TIMESTAMP", 0)) / 1000000).isoformat() if log_entry.get("__REALTIME_TIMESTAMP") else "N/A",
-                                    "ProviderName": log_entry.get("SYSLOG_IDENTIFIER", log_entry.get("_SYSTEMD_UNIT", "unknown")),
-                                    "Id": log_entry.get("_PID", "N/A"), # Use PID as an identifier if available
-                                    "Level": log_entry.get("PRIORITY", "N/A"), # Lower number is higher priority
-                                    "Message": log_entry.get("MESSAGE", "").strip(),
-                                    "Source": log_entry.get("_HOSTNAME", "N/A")
-                                })
-                            except json.JSONDecodeError:
-                                print_warning(f"Skipping malformed JSON line from journalctl: {line[:100]}...")
-                            except Exception as parse_exc:
-                                 print_warning(f"Error processing journalctl JSON entry: {parse_exc}")
-                    except Exception as outer_exc:
-                         print_error(f"Error processing journalctl JSON output: {outer_exc}")
+                json_ok = False
+                try:
+                    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, text=True)
+                    for line in proc.stdout:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            log_entry = _json_loads(line)
+                            # Extract relevant fields, map to consistent names
+                            logs.append({
+                                "TimeCreated": datetime.datetime.fromtimestamp(int(log_entry.get("__REALTIME_TIMESTAMP", 0)) / 1000000).isoformat() if log_entry.get("__REALTIME_TIMESTAMP") else "N/A",
+                                "ProviderName": log_entry.get("SYSLOG_IDENTIFIER", log_entry.get("_SYSTEMD_UNIT", "unknown")),
+                                "Id": log_entry.get("_PID", "N/A"), # Use PID as an identifier if available
+                                "Level": log_entry.get("PRIORITY", "N/A"), # Lower number is higher priority
+                                "Message": log_entry.get("MESSAGE", "").strip(),
+                                "Source": log_entry.get("_HOSTNAME", "N/A")
+                            })
+                        except json.JSONDecodeError:
+                            print_warning(f"Skipping malformed JSON line from journalctl: {line[:100]}...")
+                        except Exception as parse_exc:
+                             print_warning(f"Error processing journalctl JSON entry: {parse_exc}")
+                    proc.wait()
+                    json_ok = proc.returncode == 0 and bool(logs)
+                except Exception as outer_exc:
+                     print_error(f"Error processing journalctl JSON output: {outer_exc}")
 
                 # If JSON failed, try plain text parsing
-                elif not result["success"] or not result["output"]:
+                if not json_ok:
                     print_warning("journalctl JSON output failed, trying plain text.")
                     cmd = ["journalctl", "-p", "0..3", "--no-pager", "-n", str(max_logs)]
                     result = run_command(cmd, capture_output=True, shell=False, require_confirmation=False)
@@ -610,10 +1075,9 @@ def collect_system_logs(max_logs: int = 50) -> List[Dict[str, Any]]:
                     if log_count >= max_logs: break
                     if os.path.exists(log_file):
                         try:
-                            # Read last N lines (approximate) - inefficient for large files
-                             proc = subprocess.run(['tail', '-n', str(max_logs * 2), log_file], capture_output=True, text=True, check=False)
-                             if proc.stdout:
-                                 lines = proc.stdout.strip().splitlines()
+                            # Seek-and-read the tail block directly
+                             lines = _tail_lines(log_file)
+                             if lines:
                                  # Filter for error/warning keywords (very basic)
                                  for line in reversed(lines): # Read from end
                                      if log_count >= max_logs: break
@@ -634,28 +1098,46 @@ def collect_system_logs(max_logs: int = 50) -> List[Dict[str, Any]]:
             print_error(f"Error collecting Linux logs: {e}")
             print_error(traceback.format_exc())
 
-    # Sort logs by timestamp if possible before returning
+    # Sort logs by timestamp if possible before returning; key= already
+    # parses each timestamp exactly once per entry.
     try:
-        # Attempt to parse ISO format or handle fallback strings
-        def sort_key(log_entry):
-            ts_str = log_entry.get("TimeCreated", "0")
-            try:
-                return datetime.datetime.fromisoformat(ts_str)
-            except ValueError:
-                 # Fallback for non-ISO, try to get hour
-                 try:
-                     # Example: Try parsing "Month Day HH:MM:SS" like from journalctl text
-                     return datetime.datetime.strptime(ts_str, '%b %d %H:%M:%S').replace(year=datetime.datetime.now().year)
-                 except ValueError:
-                     return datetime.datetime.min # Put unparseable dates first
-
-        logs.sort(key=sort_key, reverse=True)
+        logs.sort(key=lambda log_entry: _parse_log_ts(log_entry.get("TimeCreated", "0")), reverse=True)
     except Exception as sort_e:
         print_warning(f"Could not reliably sort logs by time: {sort_e}")
 
 
     return logs
 
+# Keywords for specific error types, hoisted to module scope and precompiled
+# into one case-insensitive alternation per category: a single C-level scan of
+# each message replaces ~25 Python-level substring probes per log.
+_LOG_PATTERN_KEYWORDS = {
+    "app_crashes": ["stopped working", "crashed", "not responding", "faulting application", "hang", "freeze"],
+    "service_failures": ["service", "failed to start", "stopped unexpectedly", "terminated with error"],
+    "driver_issues": ["driver", "device", "\\driver\\", "nvlddmkm", "amdkmdag", "iaStor", "rtx"], # Added common driver names/paths
+    "permission_errors": ["permission", "access denied", " EPERM ", " EACCES "],
+    "disk_errors": ["disk", "volume", "ntfs", "ext4", " btrfs ", "harddisk", "error on device", "i/o error", "bad sector"],
+}
+_LOG_PATTERN_RES = {
+    category: re.compile("|".join(re.escape(kw) for kw in keywords), re.IGNORECASE)
+    for category, keywords in _LOG_PATTERN_KEYWORDS.items()
+}
+# Prefilter over the union of every category's keywords: one scan rejects
+# messages that can't match any category, so clean log entries skip all five
+# per-category searches below.
+_LOG_PATTERN_ANY_RE = re.compile(
+    "|".join(re.escape(kw) for kws in _LOG_PATTERN_KEYWORDS.values() for kw in kws),
+    re.IGNORECASE,
+)
+
+# Look for application names in log messages
+_KNOWN_PROBLEMATIC_APPS = [
+    "CapCut", "CCleaner", "OneDrive", "Teams", "Discord",
+    "Chrome", "Firefox", "Edge", "Skype", "Zoom", "Valorant", "Riot" # Added some games/launchers
+]
+# (display name, lowercased needle) pairs so the match loop never re-lowers
+_KNOWN_APPS_LC = [(app, app.lower()) for app in _KNOWN_PROBLEMATIC_APPS]
+
 def analyze_logs_for_patterns(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze logs for common patterns and correlate events."""
     patterns = {
@@ -664,23 +1146,14 @@ def analyze_logs_for_patterns(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
         "driver_issues": [],
         "permission_errors": [], # Added
         "disk_errors": [], # Added
-        "error_timestamps": {},
-        "frequent_sources": {},
+        "error_timestamps": Counter(),
+        "frequent_sources": {}, # Filled from the tallies below
         "suspicious_apps": set()
     }
-
-    # Keywords for specific error types
-    crash_keywords = ["stopped working", "crashed", "not responding", "faulting application", "hang", "freeze"]
-    service_keywords = ["service", "failed to start", "stopped unexpectedly", "terminated with error"]
-    driver_keywords = ["driver", "device", "\\driver\\", "nvlddmkm", "amdkmdag", "iaStor", "rtx"] # Added common driver names/paths
-    permission_keywords = ["permission", "access denied", " EPERM ", " EACCES "]
-    disk_keywords = ["disk", "volume", "ntfs", "ext4", " btrfs ", "harddisk", "error on device", "i/o error", "bad sector"]
-
-    # Look for application names in log messages
-    known_problematic_apps = [
-        "CapCut", "CCleaner", "OneDrive", "Teams", "Discord",
-        "Chrome", "Firefox", "Edge", "Skype", "Zoom", "Valorant", "Riot" # Added some games/launchers
-    ]
+    # Tally counts and levels separately: Counter's C-implemented increment
+    # and most_common() replace the nested per-source dicts plus manual sort.
+    source_counts: Counter = Counter()
+    source_levels = defaultdict(set)
 
     for log in logs:
         msg = log.get("Message", "").lower()
@@ -690,115 +1163,119 @@ def analyze_logs_for_patterns(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
 
         # Count errors by source more accurately
         source_key = source if source != "unknown" else log.get("Source", "unknown").lower() # Use Source field if ProviderName missing
-        if source_key not in patterns["frequent_sources"]:
-            patterns["frequent_sources"][source_key] = {"count": 0, "levels": set()}
-        patterns["frequent_sources"][source_key]["count"] += 1
-        if log.get("Level"): patterns["frequent_sources"][source_key]["levels"].add(str(log.get("Level")))
+        source_counts[source_key] += 1
+        level = log.get("Level")
+        if level: source_levels[source_key].add(str(level))
 
 
-        # Group by timestamp (hour level for broader clustering)
+        # Group by timestamp (hour level for broader clustering): bucket on
+        # integer hours-since-epoch so no strftime runs per log and the keys
+        # sort chronologically for free in find_time_clusters.
         if timestamp and isinstance(timestamp, str):
-            try:
-                # Attempt ISO parsing first
-                dt_obj = datetime.datetime.fromisoformat(timestamp.split('.')[0]) # Ignore ms/tz for grouping
-                hour_timestamp = dt_obj.strftime("%Y-%m-%d %H")
-            except ValueError:
-                 # Fallback for non-ISO, try to get hour
-                 parts = timestamp.split(":")
-                 if len(parts) >= 2:
-                      hour_timestamp = parts[0] # Use up to the first colon as hour key
-                 else:
-                      hour_timestamp = timestamp # Use the whole string if no colon
-            except Exception:
-                hour_timestamp = "unknown_time" # Catch any other parsing errors
-
-            if hour_timestamp not in patterns["error_timestamps"]:
-                patterns["error_timestamps"][hour_timestamp] = 0
-            patterns["error_timestamps"][hour_timestamp] += 1
-
-        # Check for patterns using keywords
-        if any(keyword in msg for keyword in crash_keywords):
-            patterns["app_crashes"].append(log)
-        if any(keyword in msg for keyword in service_keywords):
-             # Avoid double counting if already counted as crash
-             if log not in patterns["app_crashes"]:
-                patterns["service_failures"].append(log)
-        if any(keyword in msg for keyword in driver_keywords):
-            patterns["driver_issues"].append(log)
-        if any(keyword in msg for keyword in permission_keywords):
-            patterns["permission_errors"].append(log)
-        if any(keyword in msg for keyword in disk_keywords):
-            patterns["disk_errors"].append(log)
+            dt_obj = _parse_log_ts(timestamp.split('.')[0]) # Ignore ms/tz for grouping
+            if dt_obj is not datetime.datetime.min: # Skip unparseable timestamps
+                hour_bucket = int(dt_obj.timestamp()) // 3600
+                patterns["error_timestamps"][hour_bucket] += 1
+
+        # Check for patterns using the precompiled keyword alternations,
+        # behind the union prefilter: messages with no keyword at all (the
+        # common case on a healthy system) cost one scan instead of five.
+        if _LOG_PATTERN_ANY_RE.search(msg):
+            is_crash = bool(_LOG_PATTERN_RES["app_crashes"].search(msg))
+            if is_crash:
+                patterns["app_crashes"].append(log)
+            if _LOG_PATTERN_RES["service_failures"].search(msg):
+                 # Avoid double counting if already counted as crash; the old
+                 # `log not in patterns["app_crashes"]` re-scanned a growing list
+                 # (dict equality per element) for every service-failure hit.
+                 if not is_crash:
+                    patterns["service_failures"].append(log)
+            if _LOG_PATTERN_RES["driver_issues"].search(msg):
+                patterns["driver_issues"].append(log)
+            if _LOG_PATTERN_RES["permission_errors"].search(msg):
+                patterns["permission_errors"].append(log)
+            if _LOG_PATTERN_RES["disk_errors"].search(msg):
+                patterns["disk_errors"].append(log)
 
 
         # Look for known problematic applications
-        for app in known_problematic_apps:
+        for app, app_lc in _KNOWN_APPS_LC:
             # Check both message and source for app name
-            if app.lower() in msg or app.lower() in source_key:
+            if app_lc in msg or app_lc in source_key:
                 patterns["suspicious_apps"].add(app)
 
-    # Sort frequent sources by count (descending)
-    patterns["frequent_sources"] = dict(
-        sorted(patterns["frequent_sources"].items(), key=lambda item: item[1]["count"], reverse=True)
-    )
+    # Frequent sources ordered by count (descending) via most_common(). The
+    # level/app sets are finalized as sorted lists: deterministic output, and
+    # the whole result stays JSON-serializable so it can live in the cached
+    # report.
+    patterns["frequent_sources"] = {
+        source: {"count": count, "levels": sorted(source_levels[source])}
+        for source, count in source_counts.most_common()
+    }
+    patterns["suspicious_apps"] = sorted(patterns["suspicious_apps"])
+    patterns["error_timestamps"] = dict(patterns["error_timestamps"])
 
     # Find time clusters of errors (events happening close to each other)
     patterns["error_clusters"] = find_time_clusters(patterns["error_timestamps"]) # Use hour-level clustering
 
     return patterns
 
-def find_time_clusters(timestamps: Dict[str, int], min_cluster_size: int = 3, max_gap_hours: int = 1) -> List[Dict[str, Any]]:
-    """Find clusters of errors happening close together in time (hour resolution)."""
-    clusters = []
-    if not timestamps:
-        return clusters
 
-    # Sort timestamps chronologically (requires parsing YYYY-MM-DD HH or similar)
-    sorted_times = []
-    for ts_str, count in timestamps.items():
-        try:
-            # Attempt parsing YYYY-MM-DD HH format
-            dt_obj = datetime.datetime.strptime(ts_str, "%Y-%m-%d %H")
-            sorted_times.append((dt_obj, count))
-        except ValueError:
-             # Skip timestamps that don't match the expected format for clustering
-             print_warning(f"Skipping unparseable timestamp for clustering: {ts_str}")
-             pass
+def _get_log_patterns(system_report: Dict[str, Any]) -> Dict[str, Any]:
+    """Log-pattern analysis for a report, computed once and stashed on it.
 
-    if not sorted_times:
-        return clusters
+    The analysis used to run independently in problem analysis and in the
+    health report -- a full regex pass over the same log list each time. Its
+    result depends only on the collected logs, so cache it on the report
+    dict; a fresh scan produces a fresh dict and thus a fresh analysis.
+    """
+    patterns = system_report.get("_log_patterns")
+    if patterns is None:
+        patterns = analyze_logs_for_patterns(system_report.get("recent_logs", []))
+        system_report["_log_patterns"] = patterns
+    return patterns
+
+def _format_hour_bucket(hour_bucket: int) -> str:
+    """Render an hours-since-epoch bucket back to 'YYYY-MM-DD HH:MM'."""
+    return datetime.datetime.fromtimestamp(hour_bucket * 3600).strftime("%Y-%m-%d %H:%M")
+
+def find_time_clusters(timestamps: Dict[int, int], min_cluster_size: int = 3, max_gap_hours: int = 1) -> List[Dict[str, Any]]:
+    """Find clusters of errors happening close together in time (hour resolution).
 
-    sorted_times.sort(key=lambda x: x[0])
+    Keys are integer hour buckets (hours since epoch), so ordering and gap
+    checks are plain integer arithmetic; formatting only happens for the
+    clusters that actually get emitted.
+    """
+    clusters = []
+    if not timestamps:
+        return clusters
 
     current_cluster = None
 
-    for dt_obj, count in sorted_times:
+    for hour_bucket, count in sorted(timestamps.items()):
         if current_cluster is None:
             # Start the first cluster
-            current_cluster = {"start_dt": dt_obj, "end_dt": dt_obj, "count": count}
+            current_cluster = {"start": hour_bucket, "end": hour_bucket, "count": count}
+        elif hour_bucket - current_cluster["end"] <= max_gap_hours:
+            # Extend the current cluster
+            current_cluster["end"] = hour_bucket
+            current_cluster["count"] += count
         else:
-            # Check if the gap to the last event in the cluster is within the limit
-            time_diff = dt_obj - current_cluster["end_dt"]
-            if time_diff <= datetime.timedelta(hours=max_gap_hours):
-                # Extend the current cluster
-                current_cluster["end_dt"] = dt_obj
-                current_cluster["count"] += count
-            else:
-                # Gap is too large, finalize the previous cluster (if large enough)
-                if current_cluster["count"] >= min_cluster_size:
-                     clusters.append({
-                         "start": current_cluster["start_dt"].strftime("%Y-%m-%d %H:%M"),
-                         "end": current_cluster["end_dt"].strftime("%Y-%m-%d %H:%M"),
-                         "count": current_cluster["count"]
-                     })
-                # Start a new cluster
-                current_cluster = {"start_dt": dt_obj, "end_dt": dt_obj, "count": count}
+            # Gap is too large, finalize the previous cluster (if large enough)
+            if current_cluster["count"] >= min_cluster_size:
+                 clusters.append({
+                     "start": _format_hour_bucket(current_cluster["start"]),
+                     "end": _format_hour_bucket(current_cluster["end"]),
+                     "count": current_cluster["count"]
+                 })
+            # Start a new cluster
+            current_cluster = {"start": hour_bucket, "end": hour_bucket, "count": count}
 
     # Add the last cluster if it meets the size requirement
     if current_cluster and current_cluster["count"] >= min_cluster_size:
         clusters.append({
-            "start": current_cluster["start_dt"].strftime("%Y-%m-%d %H:%M"),
-            "end": current_cluster["end_dt"].strftime("%Y-%m-%d %H:%M"),
+            "start": _format_hour_bucket(current_cluster["start"]),
+            "end": _format_hour_bucket(current_cluster["end"]),
             "count": current_cluster["count"]
         })
 
@@ -810,17 +1287,34 @@ def generate_system_report() -> Dict[str, Any]:
     """Generate a comprehensive system report."""
     print_info("Generating system report...")
 
-    report = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "os_info": get_os_info(),
-        "hardware_info": get_hardware_info(),
-        "network_info": get_network_info(),
-        "recent_logs": collect_system_logs(50) # Collect slightly more logs for better pattern analysis
-    }
-
-    # Calculate report size safely
+    # The four probes are independent and spend their time waiting on
+    # subprocesses (the GIL is released there), so run them concurrently and
+    # let the report take max(probe) instead of sum(probe) wall-clock.
+    # Sections that fail or come back empty (e.g. network info on an
+    # unsupported OS) are left out of the report entirely rather than
+    # serialized as dead weight.
+    sections = (
+        ("os_info", get_os_info, ()),
+        ("hardware_info", get_hardware_info, ()),
+        ("network_info", get_network_info, ()),
+        ("recent_logs", collect_system_logs, (50,)), # Collect slightly more logs for better pattern analysis
+    )
+    report = {"timestamp": _now_iso()}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {name: executor.submit(fn, *args) for name, fn, args in sections}
+        for name, future in futures.items():
+            try:
+                value = future.result()
+                if value:
+                    report[name] = value
+            except Exception as section_e:
+                print_error(f"Report section {name} failed: {section_e}")
+
+    # Calculate report size safely: serialize once through the orjson-aware
+    # helper straight to bytes and take len(), instead of building a throwaway
+    # str and measuring its interpreter object size.
     try:
-        report_size = sys.getsizeof(json.dumps(report)) # Estimate size after JSON conversion
+        report_size = len(_json_dumps(report))
     except Exception:
         report_size = -1 # Indicate error
 
@@ -831,27 +1325,36 @@ def generate_system_report() -> Dict[str, Any]:
 # Command Execution Functions
 # =============================================================================
 
+@lru_cache(maxsize=1024)
 def is_dangerous_command(cmd_str: str) -> bool: # Takes string now
-    """Check if a command string might be dangerous."""
+    """Check if a command string might be dangerous.
+
+    Pure in its input (the pattern table is fixed after load), so repeated
+    checks of the same command — common when LLM loops re-propose variants —
+    are a single cache lookup.
+    """
     cmd_lower = cmd_str.lower()
-    # Check against dangerous command patterns first
-    if any(danger_cmd in cmd_lower for danger_cmd in CONFIG["dangerous_commands"]):
-        # Double check it's not part of a safe command explanation or path
-        # Example: avoid flagging "rm -rf /path/to/cache" if used carefully
-        # This is hard, basic check is better than nothing. Add more specific exceptions if needed.
-        # For now, any match is considered dangerous.
+    # Check against dangerous command patterns first. The patterns carry
+    # their own context (word boundaries, argument shapes, the repair-mode
+    # chkdsk rule), so any match is considered dangerous.
+    if _DANGEROUS_RE.search(cmd_str):
         return True
 
     # Check if it's a known safe diagnostic command (check the start)
     # This is less reliable if safe commands are used with dangerous flags,
     # but helps allow common diagnostics.
-    first_word = cmd_lower.split()[0]
-    if first_word in CONFIG["safe_diagnostic_commands"]:
-        # Add checks for dangerous flags on safe commands if needed, e.g. chkdsk /f /r is okay, format C: is not
-        if first_word == "chkdsk" and "/f" not in cmd_lower and "/r" not in cmd_lower:
-             return False # Basic chkdsk without repair flags is safe
-        elif first_word != "chkdsk": # Allow other safe commands more freely for now
-             return False
+    # split(None, 1) stops after the first token instead of building the
+    # whole argument list; empty commands are trivially safe.
+    parts = cmd_lower.split(None, 1)
+    if not parts:
+        return False
+    first_word = parts[0]
+    policy = CONFIG["safe_diagnostic_commands"].get(first_word)
+    if policy is not None:
+        forbidden = policy.get("forbidden_flags")
+        if forbidden and not forbidden.isdisjoint(cmd_lower.split()):
+            return True # A normally-safe command used with a disallowed flag
+        return False
 
     # Default to not dangerous if no patterns match and not explicitly safe
     # Or default to True for safety? Let's lean towards caution: if not explicitly safe, assume maybe dangerous.
@@ -860,6 +1363,197 @@ def is_dangerous_command(cmd_str: str) -> bool: # Takes string now
     return False
 
 
+class PersistentShell:
+    """Long-lived PowerShell child process for running diagnostic commands.
+
+    Spawning powershell/cmd per command costs hundreds of ms on Windows;
+    keeping one child alive and streaming commands over its stdin pays that
+    startup cost once. Output is demarcated with a sentinel line carrying the
+    native exit code.
+    """
+
+    _SENTINEL = "<<<AEON_CMD_END>>>"
+
+    def __init__(self):
+        # One lock per shell: the report probes run on a thread pool and
+        # several of them funnel into this single child process. Without
+        # mutual exclusion, concurrent writers interleave on stdin and
+        # readers steal each other's output and sentinel lines. Note that
+        # lru_cache on the probe functions doesn't help -- two threads can
+        # both enter e.g. get_hardware_info before its result is cached.
+        self._lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            ["powershell", "-NoProfile", "-NonInteractive", "-Command", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            bufsize=1, text=True, encoding='utf-8', errors='replace'
+        )
+
+    def run(self, cmd_str: str) -> Tuple[int, str]:
+        """Run one command line, returning (return_code, combined output)."""
+        # Hold the lock across the whole write+read cycle so each command's
+        # output (and its sentinel) goes to the thread that issued it.
+        with self._lock:
+            # Reset $LASTEXITCODE first: only native executables update it,
+            # so without the reset a cmdlet-only script would report
+            # whatever exit code the previous native command left behind.
+            self.proc.stdin.write(
+                f"$global:LASTEXITCODE = 0\n"
+                f"{cmd_str} 2>&1 | Out-String\n"
+                f"Write-Output \"{self._SENTINEL} $LASTEXITCODE\"\n"
+            )
+            self.proc.stdin.flush()
+
+            lines = []
+            while True:
+                line = self.proc.stdout.readline()
+                if not line: # Child died mid-command
+                    raise RuntimeError("Persistent shell terminated unexpectedly")
+                if line.startswith(self._SENTINEL):
+                    code_text = line[len(self._SENTINEL):].strip()
+                    try:
+                        return_code = int(code_text)
+                    except ValueError:
+                        return_code = 0 # Cmdlets don't always set $LASTEXITCODE
+                    return return_code, "".join(lines)
+                lines.append(line)
+
+    def run_script(self, script: str) -> Tuple[int, str]:
+        """Run a multi-line PowerShell script body in the live host.
+
+        Wrapping in `& { ... }` keeps the host reading until the block
+        closes, so scripts with pipelines and calculated properties work
+        exactly as they would in a one-shot -Command invocation.
+        """
+        return self.run(f"& {{\n{script}\n}}")
+
+    def close(self) -> None:
+        try:
+            if self.proc.poll() is None:
+                self.proc.stdin.close()
+                self.proc.terminate()
+        except Exception:
+            pass
+
+
+def run_diagnostics_parallel(cmds: List[str], timeout: int = 30) -> Dict[str, str]:
+    """Run independent diagnostic commands concurrently.
+
+    The safe diagnostic set is I/O-bound and the commands have no data
+    dependencies, so overlapping them with a thread pool cuts wall-clock
+    time to roughly the slowest command instead of the sum of all of them.
+    Returns a mapping of command string -> captured stdout ("" on failure).
+    """
+    results: Dict[str, str] = {}
+    if not cmds:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(8, len(cmds))) as executor:
+        futures = {
+            executor.submit(subprocess.run, list(_split_command(c)),
+                            capture_output=True, text=True, timeout=timeout): c
+            for c in cmds
+        }
+        for future in as_completed(futures):
+            cmd = futures[future]
+            try:
+                proc = future.result()
+                results[cmd] = proc.stdout or ""
+            except Exception as e:
+                print_warning(f"Parallel diagnostic `{cmd}` failed: {e}")
+                results[cmd] = ""
+    return results
+
+
+_persistent_shell: Optional[PersistentShell] = None
+_persistent_shell_failed = False
+
+def get_persistent_shell() -> Optional[PersistentShell]:
+    """Return the shared PersistentShell, creating it on first use (Windows only)."""
+    global _persistent_shell, _persistent_shell_failed
+    if not _IS_WINDOWS or _persistent_shell_failed:
+        return None
+    if _persistent_shell is None or _persistent_shell.proc.poll() is not None:
+        try:
+            _persistent_shell = PersistentShell()
+            atexit.register(_persistent_shell.close)
+        except Exception as e:
+            print_warning(f"Could not start persistent shell, falling back to per-command spawn: {e}")
+            _persistent_shell_failed = True
+            return None
+    return _persistent_shell
+
+
+def run_powershell(script: str) -> Dict[str, Any]:
+    """Run a PowerShell script, preferring the long-lived host.
+
+    Amortizes PowerShell's startup cost across every Windows query in this
+    module; falls back to a one-shot spawn if the persistent shell is
+    unavailable or its pipe breaks.
+    """
+    shell_proc = get_persistent_shell()
+    if shell_proc is not None:
+        try:
+            return_code, output = shell_proc.run_script(script)
+            return {"success": return_code == 0, "output": output, "error": ""}
+        except Exception as shell_e:
+            print_warning(f"Persistent shell failed ({shell_e}), using direct spawn.")
+    return run_command(["powershell", "-NoProfile", "-Command", script],
+                       capture_output=True, shell=False, require_confirmation=False)
+
+
+@lru_cache(maxsize=1)
+def _oem_codepage() -> str:
+    """Detect the Windows OEM codepage once per process.
+
+    The codepage can't change mid-session, and spawning chcp to learn it
+    costs more than many short diagnostic commands themselves.
+    """
+    try:
+        chcp_out = subprocess.check_output(["chcp"], shell=True, text=True)
+        return f'cp{chcp_out.split(":")[-1].strip()}'
+    except Exception:
+        print_warning("Could not detect OEM codepage, using utf-8. Output might be garbled.")
+        return 'utf-8'
+
+
+@lru_cache(maxsize=512)
+def _split_command(cmd_str: str) -> Tuple[str, ...]:
+    """Memoized shlex.split; the fixed diagnostic commands get split once total.
+
+    Propagates ValueError on malformed input just like shlex.split, so
+    callers keep their existing fallbacks.
+    """
+    return tuple(shlex.split(cmd_str))
+
+
+def _first_token(cmd_str: str) -> str:
+    """First whitespace-delimited token of a command, lowercased.
+
+    Classification only ever needs the leading word; running the full shlex
+    state machine for that is wasted work unless the command actually starts
+    with a quote.
+    """
+    stripped = cmd_str.lstrip()
+    if not stripped:
+        return ""
+    if stripped[0] in ('"', "'"):
+        try:
+            return _split_command(stripped)[0].lower()
+        except (ValueError, IndexError):
+            pass # Unbalanced quote; fall through to the plain split
+    return stripped.split(None, 1)[0].lower()
+
+
+# Adjustments for the persistent-PowerShell fast path: PowerShell shadows
+# some cmd-flavored names with its own aliases, so running them verbatim
+# mis-executes -- 'where' hits the Where-Object alias (empty output, exit 0:
+# a silent false success in a path meant to verify commands) and 'dir'
+# resolves to Get-ChildItem, which rejects cmd-style flags like /s. Rewrite
+# to the real executable where one exists; cmd builtins without an .exe
+# skip the fast path and go through the normal spawn.
+_PS_EXE_REWRITES = {"where": "where.exe"}
+_PS_INCOMPATIBLE_CMDS = frozenset({"dir"})
+
 def run_command(command: Union[List[str], str], # Allow string for shell=True
                 capture_output: bool = True,
                 shell: bool = False, # Default to False for security
@@ -885,7 +1579,7 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
         if not cmd_list:
              print_error("Received empty command list.")
              return {"command": "[]", "success": False, "error": "Empty command list", "executed": False, "confirmed": False}
-        cmd_str = " ".join(shlex.quote(str(arg)) for arg in cmd_list) # Create a safe string representation for logging/display
+        cmd_str = shlex.join(str(arg) for arg in cmd_list) # Create a safe string representation for logging/display
 
     result = {
         "command_str": cmd_str, # Log the string representation
@@ -901,8 +1595,10 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
     }
 
     # --- Safety Check ---
-    # Use cmd_str for safety check regardless of shell mode
-    dangerous = is_dangerous_command(cmd_str)
+    # Scan the raw argument join rather than the quoted display string:
+    # quoting is irrelevant to danger detection, and quotes around an
+    # argument would hide patterns from the scanner.
+    dangerous = is_dangerous_command(cmd_str if shell else " ".join(map(str, cmd_list)))
 
     # --- Confirmation ---
     # Always require confirmation if command is flagged as dangerous
@@ -941,9 +1637,38 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
         try:
             print_info(f"Executing (`shell={shell}`): `{cmd_str}`")
 
+            # Fast path: route internal safe diagnostics through the persistent
+            # PowerShell so each one skips process-spawn overhead. Names the
+            # PowerShell host would shadow are rewritten to their .exe form
+            # (or excluded) -- see _PS_EXE_REWRITES above.
+            first_word = cmd_list[0].lower() if cmd_list else ""
+            if (not shell and capture_output and not require_confirmation
+                    and first_word in CONFIG["safe_diagnostic_commands"]
+                    and first_word not in _PS_INCOMPATIBLE_CMDS):
+                shell_proc = get_persistent_shell()
+                if shell_proc is not None:
+                    try:
+                        ps_cmd_list = [_PS_EXE_REWRITES.get(first_word, cmd_list[0]), *cmd_list[1:]]
+                        start_ns = time.perf_counter_ns()
+                        return_code, output = shell_proc.run(subprocess.list2cmdline(ps_cmd_list))
+                        result["execution_time"] = (time.perf_counter_ns() - start_ns) / 1e9
+                        result["return_code"] = return_code
+                        result["success"] = return_code == 0
+                        result["executed"] = True
+                        result["output"] = output
+                        log_action("command_executed", {
+                            "command": cmd_str,
+                            "shell": "persistent",
+                            "return_code": return_code,
+                            "execution_time": result["execution_time"],
+                        }, success=result["success"])
+                        return result
+                    except Exception as shell_e:
+                        # Shell pipe broke: fall through to the regular spawn path
+                        print_warning(f"Persistent shell failed ({shell_e}), using direct spawn.")
 
             # Special handling for MSC files (Windows Management Console)
-            if cmd_str.lower().endswith('.msc') and platform.system() == "Windows":
+            if cmd_str.lower().endswith('.msc') and _IS_WINDOWS:
                 # For MSC files, we need to use shell=True and prefix with 'start'
                 print_info("Detected MSC file, using special handling...")
                 modified_cmd = f"start {cmd_str}"
@@ -953,6 +1678,49 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
                 # Use appropriate argument for subprocess.run based on shell mode
                 run_arg = cmd_str if shell else cmd_list
 
+            # Set encoding based on platform for better text handling
+            stdout_encoding = _oem_codepage() if _IS_WINDOWS else 'utf-8'
+
+            # Single execution helper shared by both UI branches; run_arg is
+            # fixed above, so the MSC rewrite is no longer clobbered by a
+            # second `cmd_str if shell else cmd_list` inside the branch.
+            def _invoke():
+                # text=True decodes during capture instead of buffering the
+                # whole byte blob and decoding it again afterwards, halving
+                # peak memory on large-output commands.
+                return subprocess.run(
+                    run_arg,
+                    capture_output=capture_output,
+                    text=True,
+                    encoding=stdout_encoding,
+                    errors='replace', # Never raise on odd console bytes
+                    shell=shell,
+                    check=False, # Don't raise exception on non-zero exit code
+                )
+
+            # Fast path for fire-and-forget commands when no spinner is
+            # wanted: subprocess.call skips pipe allocation entirely and
+            # there is no byte blob to decode afterwards.
+            if not capture_output and not RICH_AVAILABLE:
+                start_ns = time.perf_counter_ns()
+                return_code = subprocess.call(run_arg, shell=shell)
+                result["execution_time"] = (time.perf_counter_ns() - start_ns) / 1e9
+                result["return_code"] = return_code
+                result["success"] = return_code == 0
+                result["executed"] = True
+                log_details = {
+                    "command": cmd_str,
+                    "shell": shell,
+                    "return_code": return_code,
+                    "execution_time": result["execution_time"],
+                }
+                if result["success"]:
+                    print_success(f"Command completed successfully (Code: {return_code}, Time: {result['execution_time']:.2f}s)")
+                else:
+                    print_error(f"Command failed (Code: {return_code}, Time: {result['execution_time']:.2f}s)")
+                log_action("command_executed", log_details, success=result["success"])
+                return result
+
             # Show spinner while command is running (if Rich is available)
             if RICH_AVAILABLE:
                 with Progress(
@@ -962,64 +1730,24 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
                     console=console
                 ) as progress:
                     task = progress.add_task(f"Running: {cmd_str}", total=None)
-                    start_time = time.time()
-                    # Use appropriate argument for subprocess.run based on shell mode
-                    run_arg = cmd_str if shell else cmd_list
-                    # Set encoding based on platform for better text handling
-                    stdout_encoding = 'utf-8'
-                    stderr_encoding = 'utf-8'
-                    if platform.system() == "Windows":
-                        try:
-                            oem_cp = f'cp{subprocess.check_output(["chcp"], shell=True, text=True).split(":")[-1].strip()}'
-                            stdout_encoding = oem_cp
-                            stderr_encoding = oem_cp
-                        except Exception:
-                            print_warning("Could not detect OEM codepage, using utf-8. Output might be garbled.")
-                    process = subprocess.run(
-                        run_arg,
-                        capture_output=capture_output,
-                        text=False, # Capture as bytes first
-                        shell=shell,
-                        check=False, # Don't raise exception on non-zero exit code
-                    )
+                    start_ns = time.perf_counter_ns()
+                    process = _invoke()
                     progress.remove_task(task)
-                    execution_time = time.time() - start_time
+                    end_ns = time.perf_counter_ns()
             else:
-                start_time = time.time()
-                run_arg = cmd_str if shell else cmd_list
-                stdout_encoding = 'utf-8'
-                stderr_encoding = 'utf-8'
-                if platform.system() == "Windows":
-                    try:
-                        oem_cp = f'cp{subprocess.check_output(["chcp"], shell=True, text=True).split(":")[-1].strip()}'
-                        stdout_encoding = oem_cp
-                        stderr_encoding = oem_cp
-                    except Exception:
-                        print_warning("Could not detect OEM codepage, using utf-8. Output might be garbled.")
-                process = subprocess.run(
-                    run_arg,
-                    capture_output=capture_output,
-                    text=False, # Capture as bytes first
-                    shell=shell,
-                    check=False, # Don't raise exception on non-zero exit code
-                )
-                execution_time = time.time() - start_time
-            result["execution_time"] = round(execution_time, 2)
+                start_ns = time.perf_counter_ns()
+                process = _invoke()
+                end_ns = time.perf_counter_ns()
+            # Monotonic clock, full precision stored; rounding happens only
+            # where the value is rendered for display.
+            result["execution_time"] = (end_ns - start_ns) / 1e9
             result["return_code"] = process.returncode
             result["success"] = process.returncode == 0
             result["executed"] = True
-            # Decode output and error streams carefully
+            # Streams arrive already decoded (errors='replace' above)
             if capture_output:
-                try:
-                    result["output"] = process.stdout.decode(stdout_encoding, errors='replace') if process.stdout else ""
-                except Exception as decode_e:
-                    print_error(f"Error decoding stdout: {decode_e}")
-                    result["output"] = repr(process.stdout) # Show raw bytes on decode error
-                try:
-                    result["error"] = process.stderr.decode(stderr_encoding, errors='replace') if process.stderr else ""
-                except Exception as decode_e:
-                    print_error(f"Error decoding stderr: {decode_e}")
-                    result["error"] = repr(process.stderr)
+                result["output"] = process.stdout or ""
+                result["error"] = process.stderr or ""
             # Log the action
             log_details = {
                 "command": cmd_str,
@@ -1028,10 +1756,10 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
                 "execution_time": result["execution_time"],
             }
             if result["success"]:
-                print_success(f"Command completed successfully (Code: {process.returncode}, Time: {result['execution_time']}s)")
+                print_success(f"Command completed successfully (Code: {process.returncode}, Time: {result['execution_time']:.2f}s)")
                 log_action("command_executed", log_details, success=True)
             else:
-                print_error(f"Command failed (Code: {process.returncode}, Time: {result['execution_time']}s)")
+                print_error(f"Command failed (Code: {process.returncode}, Time: {result['execution_time']:.2f}s)")
                 # Always show stderr if command failed and stderr has content
                 if result["error"]:
                     print_error(f"Stderr: {result['error'].strip()}")
@@ -1055,18 +1783,19 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
             log_action("command_error", {"command": cmd_str, "error": error_msg, "reason": "timeout"}, success=False)
         except Exception as e:
             error_msg = f"Error executing command: {e}"
-            tb = traceback.format_exc()
             print_error(error_msg)
-            print_error(f"Traceback:\n{tb}") # Print traceback for debugging
             result["error"] = error_msg
-            result["traceback"] = tb # Store traceback
             result["success"] = False
             result["executed"] = False # Assume not fully executed if exception hit
-            log_action("command_error", {
-                "command": cmd_str,
-                "error": error_msg,
-                "traceback": tb
-            }, success=False)
+            error_details = {"command": cmd_str, "error": error_msg}
+            # Formatting a traceback walks every frame and builds strings;
+            # only pay for that when someone is actually debugging.
+            if CONFIG["debug"]:
+                tb = traceback.format_exc()
+                print_error(f"Traceback:\n{tb}")
+                result["traceback"] = tb # Store traceback
+                error_details["traceback"] = tb
+            log_action("command_error", error_details, success=False)
     return result
 
 
@@ -1079,18 +1808,21 @@ def run_command(command: Union[List[str], str], # Allow string for shell=True
 def _list_ollama_models_cli() -> List[str]:
     """Helper function to list models using the 'ollama list' command."""
     try:
-        # Ensure run_command is available and works before this point
-        result = run_command(["ollama", "list"], capture_output=True, shell=False, require_confirmation=False)
-        if result["success"] and result["output"]:
-             lines = result["output"].strip().split('\n')
+        # Internal probe with a fixed argv: call subprocess directly rather
+        # than going through run_command's danger scan, logging and display
+        # machinery. Bytes in, first column out.
+        result = subprocess.run(["ollama", "list"], capture_output=True,
+                                check=False, timeout=10)
+        if result.returncode == 0 and result.stdout:
+             lines = result.stdout.splitlines()
              if len(lines) > 1: # Check if there's more than just the header
-                 # Extract first column, skipping the header
-                 # Handle potential variation in spacing using split(maxsplit=1) or similar if needed
-                 models = []
-                 for line in lines[1:]:
-                     parts = line.split() # Simple split might suffice
-                     if parts: # Ensure the line wasn't just whitespace
-                         models.append(parts[0]) # Take the first part as model name
+                 # Extract first column, skipping the header via islice so the
+                 # tail of the list isn't copied just to drop one row
+                 models = [
+                     parts[0].decode("utf-8", errors="replace")
+                     for line in islice(lines, 1, None)
+                     if (parts := line.split(None, 1)) # Skip blank rows
+                 ]
 
                  if models:
                       print_info(f"Found {len(models)} models via 'ollama list' command.")
@@ -1103,25 +1835,51 @@ def _list_ollama_models_cli() -> List[str]:
                  return []
         else:
             # Log error if command failed or no output
-            error_msg = result.get('error', 'No output received')
+            error_msg = result.stderr.decode("utf-8", errors="replace").strip() if result.stderr else 'No output received'
             print_error(f"Failed to run 'ollama list' command: {error_msg}")
             return []
     except FileNotFoundError:
          # Handle case where 'ollama' command itself is not found
          print_error("'ollama' command not found in PATH. Cannot list models via CLI.")
          return []
+    except subprocess.TimeoutExpired:
+         print_error("'ollama list' command timed out after 10s.")
+         return []
     except Exception as cli_e:
          # Catch any other exceptions during CLI execution
          print_error(f"Error executing 'ollama list' command: {cli_e}")
-         print_error(traceback.format_exc()) # Show traceback for debugging
+         if CONFIG["debug"]: # Stack walk is only worth paying for when debugging
+             print_error(traceback.format_exc())
          return []
 
 
+# The installed model set rarely changes mid-session, but the old code hit
+# the API (or spawned the CLI) on every menu visit. Cache the last good list
+# for a few minutes; an empty result is never cached so a daemon that comes
+# up later is noticed on the next call.
+_MODELS_TTL = 300.0
+_models_cache: Optional[Tuple[float, List[str]]] = None
+
 # THIS IS THE CORRECTED FUNCTION
-def list_ollama_models() -> List[str]:
+def list_ollama_models(force_refresh: bool = False) -> List[str]:
     """List available Ollama models, preferring API, falling back to CLI."""
+    global _models_cache
+    if not force_refresh and _models_cache is not None:
+        cached_at, cached_models = _models_cache
+        if time.monotonic() - cached_at < _MODELS_TTL:
+            return list(cached_models)
+
+    models = _list_ollama_models_uncached()
+    if models:
+        _models_cache = (time.monotonic(), list(models))
+    return models
+
+
+def _list_ollama_models_uncached() -> List[str]:
+    """Fetch the model list from the API, falling back to the CLI."""
     # Check if client is usable first
-    if OLLAMA_AVAILABLE and llm_client:
+    llm_client = get_llm_client()
+    if llm_client:
         try:
             print_info("Attempting to list models via Ollama API...")
             models_info = llm_client.list()
@@ -1144,19 +1902,16 @@ def list_ollama_models() -> List[str]:
                  return _list_ollama_models_cli() # Call helper for CLI
             # --- End Robust Checks ---
 
-            # Safely extract names, checking each model dictionary
-            valid_model_names = []
-            for model_data in models_list:
-                if isinstance(model_data, dict):
-                    model_name = model_data.get('name') # Safely get the name using .get()
-                    if model_name and isinstance(model_name, str): # Check if name exists and is a string
-                        valid_model_names.append(model_name)
-                    else:
-                        # Log if a model entry is missing a name or name is not a string
-                        print_warning(f"Found model data with missing or invalid 'name' key: {model_data}")
-                else:
-                     # Log if an item in the 'models' list isn't a dictionary
-                     print_warning(f"Found non-dictionary item in models list: {model_data}")
+            # Safely extract names in one pass; a single aggregated warning
+            # replaces the old per-entry prints for malformed catalog rows
+            valid_model_names = [
+                name for model_data in models_list
+                if isinstance(model_data, dict)
+                and isinstance((name := model_data.get('name')), str) and name
+            ]
+            skipped = len(models_list) - len(valid_model_names)
+            if skipped:
+                print_warning(f"Skipped {skipped} model entries with missing or invalid 'name' key.")
 
             if not valid_model_names:
                  print_warning("Ollama API returned model data, but no valid model names could be extracted.")
@@ -1170,7 +1925,8 @@ def list_ollama_models() -> List[str]:
         except Exception as e:
             # Keep the general exception handler but log more context
             print_error(f"Error listing Ollama models via API: {e}")
-            print_error(traceback.format_exc()) # Print traceback for detailed debugging
+            if CONFIG["debug"]:
+                print_error(traceback.format_exc())
             # Fallback to CLI on *any* API exception
             print_info("Falling back to 'ollama list' command...")
             return _list_ollama_models_cli() # Call helper for CLI
@@ -1190,17 +1946,25 @@ def select_model(models: List[str]) -> Optional[str]:
     for idx, model_name in enumerate(models, start=1):
         print(f"{idx}. {model_name}")
 
+    if RICH_AVAILABLE:
+        # IntPrompt validates and re-asks natively; no manual retry loop
+        try:
+            choices = [str(i) for i in range(1, len(models) + 1)]
+            selection_idx = IntPrompt.ask("Choose a model number to use",
+                                          choices=choices, default=1) - 1
+            selected_model = models[selection_idx]
+            print_success(f"Selected model: {selected_model}")
+            return selected_model
+        except EOFError: # Handle Ctrl+D or unexpected end of input
+            print_warning("\nSelection cancelled.")
+            return None
+
     # Loop for valid input
     while True:
         try:
             default_choice = "1"
             prompt_text = f"Choose a model number to use [{default_choice}]:"
-
-            if RICH_AVAILABLE:
-                selection_str = Prompt.ask(prompt_text, default=default_choice)
-            else:
-                selection_str = input(prompt_text) or default_choice
-
+            selection_str = input(prompt_text) or default_choice
             selection_idx = int(selection_str) - 1 # Convert to 0-based index
 
             if 0 <= selection_idx < len(models):
@@ -1218,7 +1982,8 @@ def select_model(models: List[str]) -> Optional[str]:
 
 def ask_llm(prompt: str, model: str, system_message: str = None) -> Optional[str]:
     """Ask a question to the LLM, handling potential errors."""
-    if not OLLAMA_AVAILABLE or not llm_client:
+    llm_client = get_llm_client()
+    if not llm_client:
         print_error("Ollama is not available or client not initialized. Cannot query LLM.")
         return None
     if not model:
@@ -1237,81 +2002,176 @@ def ask_llm(prompt: str, model: str, system_message: str = None) -> Optional[str
         # Log the prompt being sent (optional, for debugging)
         # log_action("llm_query", {"model": model, "prompt_start": prompt[:200] + "..."})
 
-        # Make the API call
-        response = llm_client.chat(model=model, messages=messages)
-
-        # Extract content and log success
-        content = response["message"]["content"]
+        # Stream the reply so perceived latency is time-to-first-token, not
+        # time-to-last. With Rich available the tokens are buffered and the
+        # caller renders the full Markdown once; in plain mode they are echoed
+        # live (callers skip their own re-print in that case).
+        chunks = []
+        for token in llm_client.chat_stream(model=model, messages=messages):
+            if not RICH_AVAILABLE:
+                sys.stdout.write(token)
+                sys.stdout.flush()
+            chunks.append(token)
+        if not RICH_AVAILABLE and chunks:
+            sys.stdout.write("\n")
+
+        content = "".join(chunks)
         # log_action("llm_response", {"model": model, "response_length": len(content)}, success=True)
         print_info("LLM response received.") # Confirmation
         return content
 
     except Exception as e:
-        # Log detailed error
+        # Log detailed error; the traceback is formatted only under debug
+        # since an Ollama server flapping can hit this path repeatedly.
         error_msg = f"Error querying LLM ({model}): {e}"
-        tb = traceback.format_exc()
         print_error(error_msg)
-        log_action("llm_error", {"model": model, "error": str(e), "traceback": tb}, success=False)
+        error_details = {"model": model, "error": str(e)}
+        if CONFIG["debug"]:
+            error_details["traceback"] = traceback.format_exc()
+        log_action("llm_error", error_details, success=False)
         return None
 
 
-def analyze_problem(problem_description: str, system_report: Dict[str, Any],
-                   memory: Dict[str, Any], model: str) -> Optional[str]:
-    """Analyze a problem using the LLM and system information, providing detailed instructions."""
-    # Extract logs from the system report
-    logs = system_report.get("recent_logs", [])
+def ask_llm_many(prompts: List[str], model: str,
+                 system_message: str = None) -> List[Optional[str]]:
+    """Run several independent LLM queries concurrently.
+
+    Results come back in the same order as `prompts`. Requests overlap at the
+    HTTP layer (and cache hits return instantly), so a batch of N prompts
+    costs roughly one round-trip of queueing instead of N sequential ones.
+    """
+    if not prompts:
+        return []
+    if len(prompts) == 1:
+        return [ask_llm(prompts[0], model, system_message)]
+
+    results: List[Optional[str]] = [None] * len(prompts)
+    with ThreadPoolExecutor(max_workers=min(4, len(prompts))) as executor:
+        futures = {
+            executor.submit(ask_llm, prompt, model, system_message): idx
+            for idx, prompt in enumerate(prompts)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                print_error(f"Batched LLM query {idx + 1} failed: {e}")
+    return results
+
+
+# Prompt line for one log record, bound once: str.format through a prebuilt
+# template is cheaper than rebuilding an f-string's formatting bytecode
+# per record on every analysis call.
+_LOG_FMT = "- [{}] Lvl: {} Src: {} ID: {} | {}".format
+
+# Severity ranking for log sampling, covering both vocabularies the collector
+# produces: journald numeric priorities (lower number = more severe) and
+# Windows level display names. Unknown levels rank lowest.
+_LEVEL_PRIORITY = {
+    "0": 7, "1": 6, "2": 5, "3": 4, # journald emerg/alert/crit .. err
+    "critical": 7, "error": 5, "warning": 3,
+    "warning/error": 4, # plain-text fallback's guessed level
+}
+
+
+def _log_severity(log: Dict[str, Any]) -> Tuple[int, str]:
+    """Sort key: (severity rank, timestamp) -- most severe and newest first."""
+    level = str(log.get("Level", log.get("LevelDisplayName", ""))).lower()
+    return (_LEVEL_PRIORITY.get(level, 0), log.get("TimeCreated", "") or "")
+
 
-    # Analyze logs for patterns
-    log_patterns = analyze_logs_for_patterns(logs)
+def _format_log_lines(logs: List[Dict[str, Any]], limit: int = 15) -> str:
+    """Render a sample of log records as prompt bullet lines.
 
-    # Format log patterns for LLM consumption
-    patterns_text = ""
+    dict.get (not itemgetter) on purpose: records legitimately omit fields
+    -- Windows events carry no "Level" key, journald entries no "Source" --
+    and itemgetter has no per-key default. A list comprehension feeds join
+    so it can presize the result instead of growing from a generator, and
+    islice walks the first records in place rather than slicing off a copy.
+
+    When more records than the limit are available, the sample keeps the
+    most severe entries (newest first within a severity) instead of blindly
+    truncating to the newest -- a critical event further back shouldn't be
+    dropped for a fresh warning. nlargest is O(N log limit), cheaper than a
+    full sort-then-slice.
+    """
+    if len(logs) > limit:
+        logs = heapq.nlargest(limit, logs, key=_log_severity)
+    return "\n".join(
+        [_LOG_FMT(log.get('TimeCreated', 'N/A'), log.get('Level', 'N/A'),
+                  log.get('ProviderName', 'N/A'), log.get('Id', 'N/A'),
+                  log.get('Message', 'N/A'))
+         for log in islice(logs, limit)]
+    )
+
+
+def _format_log_patterns(log_patterns: Dict[str, Any]) -> str:
+    """Render analyze_logs_for_patterns output as prompt bullet lines.
+
+    Parts are collected in a list and joined once rather than growing a
+    string with repeated concatenation. Returns "" when nothing notable was
+    found; callers supply their own placeholder sentence.
+    """
+    pattern_parts = []
     if log_patterns.get("suspicious_apps"):
-        patterns_text += f"- Suspicious applications mentioned: {', '.join(log_patterns['suspicious_apps'])}\n"
+        pattern_parts.append(f"- Suspicious applications mentioned: {', '.join(log_patterns['suspicious_apps'])}\n")
     if log_patterns.get("app_crashes"):
-        patterns_text += f"- Application crash events detected: {len(log_patterns['app_crashes'])}\n"
+        pattern_parts.append(f"- Application crash events detected: {len(log_patterns['app_crashes'])}\n")
     if log_patterns.get("service_failures"):
-        patterns_text += f"- Service failure events detected: {len(log_patterns['service_failures'])}\n"
+        pattern_parts.append(f"- Service failure events detected: {len(log_patterns['service_failures'])}\n")
     if log_patterns.get("driver_issues"):
-        patterns_text += f"- Potential driver issue events detected: {len(log_patterns['driver_issues'])}\n"
+        pattern_parts.append(f"- Potential driver issue events detected: {len(log_patterns['driver_issues'])}\n")
     if log_patterns.get("permission_errors"):
-        patterns_text += f"- Permission error events detected: {len(log_patterns['permission_errors'])}\n"
+        pattern_parts.append(f"- Permission error events detected: {len(log_patterns['permission_errors'])}\n")
     if log_patterns.get("disk_errors"):
-        patterns_text += f"- Potential disk error events detected: {len(log_patterns['disk_errors'])}\n"
+        pattern_parts.append(f"- Potential disk error events detected: {len(log_patterns['disk_errors'])}\n")
 
     if log_patterns.get("frequent_sources"):
-        top_sources = list(log_patterns["frequent_sources"].items())[:5] # Show top 5
-        patterns_text += "- Most frequent error/warning sources:\n"
+        # Already ordered by count, so the top 5 is just the first 5 entries
+        top_sources = islice(log_patterns["frequent_sources"].items(), 5)
+        pattern_parts.append("- Most frequent error/warning sources:\n")
         for source, data in top_sources:
              levels = ', '.join(data['levels'])
-             patterns_text += f"  - {source}: {data['count']} occurrences (Levels: {levels})\n"
+             pattern_parts.append(f"  - {source}: {data['count']} occurrences (Levels: {levels})\n")
 
     if log_patterns.get("error_clusters"):
-        patterns_text += "- Significant error clusters (time periods with high error counts):\n"
+        pattern_parts.append("- Significant error clusters (time periods with high error counts):\n")
         for cluster in log_patterns["error_clusters"][:3]: # Show top 3 clusters
-            patterns_text += f"  - {cluster['count']} errors between {cluster['start']} and {cluster['end']}\n"
+            pattern_parts.append(f"  - {cluster['count']} errors between {cluster['start']} and {cluster['end']}\n")
+
+    return "".join(pattern_parts)
+
+
+def analyze_problem(problem_description: str, system_report: Dict[str, Any],
+                   memory: Dict[str, Any], model: str) -> Optional[str]:
+    """Analyze a problem using the LLM and system information, providing detailed instructions."""
+    # Extract logs from the system report
+    logs = system_report.get("recent_logs", [])
+
+    # Analyze logs for patterns (computed once per scan, shared with the
+    # health report)
+    log_patterns = _get_log_patterns(system_report)
 
+    # Format log patterns for LLM consumption (shared with the health reports)
+    patterns_text = _format_log_patterns(log_patterns)
     if not patterns_text: # Handle case where no patterns found
         patterns_text = "No specific error patterns detected in the analyzed logs."
 
     # Format a sample of logs for context
-    logs_text = ""
     if logs:
-        logs_text = "**Recent System Logs (up to 15 most recent errors/warnings/critical):**\n"
-        logs_text += "\n".join(
-            # Improved formatting for readability
-            f"- [{log.get('TimeCreated', 'N/A')}] Lvl: {log.get('Level', 'N/A')} Src: {log.get('ProviderName', 'N/A')} ID: {log.get('Id','N/A')} | {log.get('Message', 'N/A')}"
-            for log in logs[:15] # Use the already collected/sorted logs
-        )
+        logs_text = ("**Recent System Logs (up to 15 most recent errors/warnings/critical):**\n"
+                     + _format_log_lines(logs)) # Use the already collected/sorted logs
     else:
         logs_text = "**Recent System Logs:**\nNo recent system logs found or collected."
 
-    # Previous issues from memory
+    # Previous issues from memory. islice, not [:3]: once add_to_memory_list
+    # has touched the key it's a deque, and deques don't support slicing.
     previous_issues_text = ""
     if memory.get("previous_issues") and memory["previous_issues"]:
         previous_issues_text = "**Previous Issues:**\n" + "\n".join(
             f"- {issue.get('timestamp', 'N/A')[:16]}: {issue.get('description', 'Unknown')} (Resolved: {issue.get('resolved', 'Unknown')})"
-            for issue in memory.get("previous_issues", [])[:3] # Only last 3 issues
+            for issue in islice(memory["previous_issues"], 3) # Only last 3 issues
         )
 
     # OS information
@@ -1321,6 +2181,14 @@ def analyze_problem(problem_description: str, system_report: Dict[str, Any],
     os_arch = os_info.get('System Type', os_info.get('architecture', 'Unknown'))
     os_info_text = f"OS: {os_name} {os_version} ({os_arch})"
 
+    # Hardware lines: walk the nested report dicts once instead of repeating
+    # the same .get() chains several times inside the prompt template.
+    hw = system_report.get("hardware_info", {}) or {}
+    mobo = hw.get("Motherboard", {}) or {}
+    cpu = hw.get("CPU", {}) or {}
+    mobo_line = f"Motherboard: {mobo.get('Manufacturer', '')} {mobo.get('Product', '')}" if mobo else ""
+    cpu_line = f"CPU: {cpu.get('Name', 'N/A')}" if cpu else ""
+
     # Create prompt for LLM with enhanced log analysis and **NEW** detailed guidelines
     prompt = f"""
 You are an expert PC troubleshooting assistant running locally on the user's machine.
@@ -1332,8 +2200,8 @@ Your goal is to diagnose the problem and provide clear, actionable steps, includ
 ---
 📊 **System Information:**
 {os_info_text}
-{("Motherboard: "+ system_report.get("hardware_info", {}).get("Motherboard", {}).get("Manufacturer", "") + " " + system_report.get("hardware_info", {}).get("Motherboard", {}).get("Product", "")) if system_report.get("hardware_info", {}).get("Motherboard") else ""}
-{("CPU: "+ system_report.get("hardware_info", {}).get("CPU", {}).get("Name", "N/A")) if system_report.get("hardware_info", {}).get("CPU") else ""}
+{mobo_line}
+{cpu_line}
 
 ---
 📉 **Log Analysis Patterns:**
@@ -1406,94 +2274,154 @@ Begin your analysis and provide your structured response now. Start with the dia
     return ask_llm(prompt, model, system_message="You are a helpful and cautious PC diagnostic assistant providing structured troubleshooting plans.")
 
 
-def extract_commands_from_llm_response(response: str) -> List[Dict[str, Any]]:
+# Extraction patterns for extract_commands_from_llm_response, compiled once
+# at import instead of recompiled per call (the regex-cache lookup alone
+# shows up when every LLM turn is scanned).
+# Command format: [[*** command ***]]
+_CMD_RE = re.compile(r"\[\[\*\*\*\s*(.*?)\s*\*\*\*\]\]")
+# URL format suggestion: [[URL: url ]] (Case-insensitive)
+_URL_RE = re.compile(r"\[\[URL:\s*(https?://[^\s\]]+)\s*\]\]", re.IGNORECASE)
+def _last_sentence(text: str) -> str:
+    """Final sentence of text: the part after the last '[.!?]<space>' boundary.
+
+    A reverse character scan over the (at most ~200 char) context window,
+    instead of regex-splitting the whole window into a throwaway list.
     """
-    Extract commands and potentially other actionable items (like URLs)
-    from LLM response using special formats. Now case-insensitive for URL tag.
+    for i in range(len(text) - 2, -1, -1):
+        if text[i] in ".!?" and text[i + 1].isspace():
+            return text[i + 1:].strip()
+    return text
+
+# *nix-only commands that mark a suggestion as invalid on Windows, and the
+# phrasings that should be mapped to the memory-diagnostic executable.
+_NIX_CMDS = frozenset({"which", "sudo", "apt", "yum", "dnf", "apt-get"})
+_MDSCHED_TOKENS = ("memory diagnostic", "mdsched")
+
+
+# Common built-ins or commands usually found directly; anything here skips
+# the existence probe in handle_llm_response. Module-level frozenset so the
+# list isn't rebuilt (and re-scanned linearly) on every command iteration.
+_KNOWN_BUILTINS = frozenset({
+    'cmd', 'powershell', 'ren', 'copy', 'del', 'dir', 'move', 'rd', 'md',
+    'echo', 'set', 'net', 'chkdsk', 'regsvr32', 'sfc', 'wmic', 'tasklist',
+    'ipconfig', 'systeminfo', 'driverquery', 'where', 'start', 'msinfo32',
+    'dxdiag', 'devmgmt.msc', 'eventvwr.msc', 'services.msc', 'taskmgr',
+    'perfmon', 'winver', 'control', 'mdsched.exe'
+})
+
+# Context strings the extractor emits when it found nothing useful; a
+# command carrying one of these gets its purpose re-derived from the
+# analysis text instead.
+_PLACEHOLDERS = frozenset({"no context provided.", "no context found.", "*", ""})
+
+@dataclass(slots=True)
+class CommandRecord:
+    """Result of one command run in an interactive session.
+
+    Slotted records cost a fraction of a seven-key dict per entry, which
+    matters for long sessions where every attempted command is retained.
     """
-    items = []
-    # Command format: [[*** command ***]]
-    command_pattern = r"\[\[\*\*\*\s*(.*?)\s*\*\*\*\]\]" # Added optional space trimming
-    # URL format suggestion: [[URL: url ]] (Case-insensitive)
-    url_pattern = r"\[\[URL:\s*(https?://[^\s\]]+)\s*\]\]" # More specific URL pattern
+    command: str
+    executed: bool
+    confirmed: bool
+    success: bool
+    output: str = ""
+    error: str = ""
+    return_code: Optional[int] = None
 
-    # --- Find URLs first ---
-    url_matches = re.finditer(url_pattern, response, re.IGNORECASE)
-    processed_indices = set() # Track processed parts of the string
 
-    for match in url_matches:
-        url_text = match.group(1).strip()
-        start_pos, end_pos = match.span()
+# Single background worker for the intermediate analyses: the request is
+# submitted as soon as a command's result is known, so inference overlaps
+# the console rendering of that result.
+_llm_pool = ThreadPoolExecutor(max_workers=1)
 
-        # Mark this region as processed
-        for i in range(start_pos, end_pos):
-            processed_indices.add(i)
 
-        # Basic context extraction (sentence before)
-        context_start = max(0, start_pos - 200)
-        context_text = response[context_start:start_pos].strip()
-        sentences = re.split(r'[.!?]\s+', context_text)
-        context = sentences[-1].strip() if sentences else context_text
+# The ~1.5KB intermediate-analysis prompt, kept as one module-level template
+# and filled with a single format_map call per step.
+_INTERMEDIATE_PROMPT_TMPL = """
+Context: We are troubleshooting the problem: "{problem_description}"
 
-        items.append({
-            "type": "url",
-            "value": url_text,
-            "context": context if context else "No context found.",
-            "original_match_position": start_pos
-        })
+History of commands executed in *this session* so far:
+{history_summary}
 
-    # --- Find Commands, avoiding already processed URL regions ---
-    command_matches = re.finditer(command_pattern, response)
+The *last* command attempted was:
+`{cmd_str}`
 
-    for match in command_matches:
-        start_pos, end_pos = match.span()
+Result:
+- Executed: {executed}
+- Confirmed by user: {confirmed}
+- Success: {success}
+- Return Code: {return_code}
+- Output/Error (truncated to 500 chars):
+Output: ```{output_context}```
+Error: ```{error_context}```
 
-        # Check if this match overlaps with a processed URL region
-        is_overlapped = False
-        for i in range(start_pos, end_pos):
-            if i in processed_indices:
-                is_overlapped = True
-                break
-        if is_overlapped:
-            continue # Skip if it's part of a URL tag we already handled
+Next *originally planned* command is: {next_planned_command_str}
 
-        cmd_text = match.group(1).strip()
-        if not cmd_text:
-            continue
+**Your Task:**
+1.  Analyze the outcome of the last command (`{cmd_str}`). What does this result tell us in the context of the problem and history? Consider both success/failure and the output/error content.
+2.  Based *only* on this outcome and the history, decide the best next step:
+    a.  **Proceed:** Continue with the next planned command ({next_planned_command_str}). Is it still relevant and safe given the last result?
+    b.  **Suggest New:** The current plan seems flawed or a better step is indicated by the last result. Suggest the *single* next command to try using the format [[*** new_command_here ***]]. Explain why this new command is better than proceeding.
+    c.  **Stop/Ask:** The plan needs rethinking, requires manual user action (like interpreting GUI output from msinfo32, checking BIOS), or the last error is critical and needs specific user attention. Recommend stopping the automated sequence.
 
-        # Context extraction
-        context_start = max(0, start_pos - 200)
-        context_text = response[context_start:start_pos].strip()
-        sentences = re.split(r'[.!?]\s+', context_text)
-        context = sentences[-1].strip() if sentences else context_text
+Provide a *brief* explanation for your recommendation (1-2 sentences).
+**Start your response clearly with ONE of the keywords:** `PROCEED`, `SUGGEST_NEW`, or `STOP`.
 
-        item_type = "command"
-        # Basic check for common *nix commands on Windows
-        # Use shlex.split to handle quoted commands before checking first word
-        try:
-             cmd_first_word = shlex.split(cmd_text)[0].lower()
-        except:
-             cmd_first_word = cmd_text.split()[0].lower() # Fallback for simple split
+Example Response (Proceed):
+PROCEED. The 'where' command found chkdsk, so running it is the correct next step.
 
-        if platform.system() == "Windows" and cmd_first_word in ["which", "sudo", "apt", "yum", "dnf", "apt-get"]:
-             item_type = "invalid_command" # Mark as potentially invalid
-        # Map known tools that aren't direct commands but executables
-        elif "memory diagnostic" in cmd_text.lower() or "mdsched" in cmd_text.lower():
-             item_type = "command"
-             cmd_text = "mdsched.exe" # Map to the actual executable
+Example Response (Suggest New):
+SUGGEST_NEW. The chkdsk command failed with access denied. Let's try running sfc /scannow first to check system files before retrying chkdsk. [[*** sfc /scannow ***]]
 
-        items.append({
-            "type": item_type,
-            "value": cmd_text,
-            "context": context if context else "No context found.",
-            "original_match_position": start_pos
-        })
+Example Response (Stop):
+STOP. The driverquery output shows very old drivers. The user should manually check the manufacturer website for updates before we continue.
+"""
 
 
-    # Sort items based on their appearance order in the response
-    items.sort(key=lambda x: x["original_match_position"])
+def _truncate(text: str, limit: int = 1000) -> str:
+    """Cap text at limit characters, appending an ellipsis when cut."""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _nonempty(text: str) -> bool:
+    """True if text has any non-whitespace; no stripped copy is allocated."""
+    return bool(text) and not text.isspace()
 
-    return items
+
+def _derive_command_context(cmd_info: Dict[str, Any], response: str) -> str:
+    """Best-effort purpose line for a command.
+
+    Prefers the context the extractor attached to the item; otherwise scans
+    the LLM analysis for the sentence or paragraph introducing the command.
+    """
+    cmd_str = cmd_info["value"]
+    cmd_context = (cmd_info.get("context") or "").strip()
+    if cmd_context and cmd_context.lower() not in _PLACEHOLDERS:
+        return cmd_context
+
+    # Find the command block and its explanation in the LLM analysis
+    pattern = re.compile(r"([^.\n]*?)(?:\n|\.)?\s*•?\s*\\*\\*\\* ?" + re.escape(cmd_str) + r" ?\\*\\*\\*", re.IGNORECASE)
+    match = pattern.search(response)
+    if match and match.group(1).strip():
+        return match.group(1).strip()
+
+    # Fallback: look for any paragraph mentioning the command
+    para_pattern = re.compile(r"([^.\n]*?\b" + re.escape(cmd_str.split()[0]) + r"\b[^.\n]*[.\n])", re.IGNORECASE)
+    para_match = para_pattern.search(response)
+    if para_match and para_match.group(1).strip():
+        return para_match.group(1).strip()
+
+    return "No purpose provided by LLM."
+
+
+# Re-analyses of the same problem often return byte-identical responses
+# (deterministic temperature plus the sqlite response cache), so the full
+# regex extraction is memoized per response text. Items are returned as a
+# tuple of dicts and copied on the way out so callers can mutate them.
+@lru_cache(maxsize=128)
+def _extract_items_cached(response: str) -> Tuple[Dict[str, Any], ...]:
+    return tuple(extract_commands_from_llm_response(response))
 
 
 # THIS IS THE CORRECTED FUNCTION
@@ -1507,11 +2435,14 @@ def handle_llm_response(response: str, problem_description: str, model: str) ->
         problem_description: The original problem description
         model: The LLM model name
     """
-    # First, display the initial LLM response
-    print_md(response)
+    # First, display the initial LLM response. In plain mode ask_llm already
+    # echoed the tokens while streaming, so re-printing would duplicate it.
+    if RICH_AVAILABLE:
+        print_md(response)
 
-    # Extract actionable items from the initial response
-    items = extract_commands_from_llm_response(response) # Use the improved extractor
+    # Extract actionable items from the initial response (memoized per
+    # response text; repeat analyses skip the regex scans entirely)
+    items = [dict(item) for item in _extract_items_cached(response)]
     executable_commands = [item for item in items if item["type"] == "command"]
     other_items = [item for item in items if item["type"] != "command"] # URLs, invalid etc.
 
@@ -1549,14 +2480,25 @@ def handle_llm_response(response: str, problem_description: str, model: str) ->
             open_urls = input(f"Open {len(urls_to_open)} detected URL(s)? [Y/n]: ").lower().strip() != 'n'
 
         if open_urls:
-            for url in urls_to_open:
+            # Launching the browser blocks on process spawn; fire the opens
+            # from a small pool so the second and third URL overlap the
+            # first's startup, then print/log serially to keep output tidy.
+            def _open_url(url: str) -> Optional[str]:
                 try:
                     webbrowser.open(url)
+                    return None
+                except Exception as e:
+                    return str(e)
+
+            with ThreadPoolExecutor(max_workers=min(4, len(urls_to_open))) as executor:
+                outcomes = list(executor.map(_open_url, urls_to_open))
+            for url, error in zip(urls_to_open, outcomes):
+                if error is None:
                     print_success(f"Attempted to open {url}")
                     log_action("url_opened", {"url": url}, success=True)
-                except Exception as e:
-                    print_error(f"Failed to open URL {url}: {e}")
-                    log_action("url_open_failed", {"url": url, "error": str(e)}, success=False)
+                else:
+                    print_error(f"Failed to open URL {url}: {error}")
+                    log_action("url_open_failed", {"url": url, "error": error}, success=False)
 
     # --- Interactive Command Execution ---
     if not executable_commands:
@@ -1575,77 +2517,76 @@ def handle_llm_response(response: str, problem_description: str, model: str) ->
 
     memory = load_memory() # Load fresh memory for history context
 
-    # Keep track of executed commands in this session for context
-    session_command_history = []
-
-    # We will iterate using an index to allow modification of the executable_commands list
+    # Keep track of executed commands in this session for context. The list
+    # holds one slotted CommandRecord per attempt in execution order; the set
+    # answers the already-ran membership check in O(1).
+    session_command_history: List[CommandRecord] = []
+    executed_command_set: set = set()
+    # Summary/prompt lines, grown one entry per executed command so the
+    # history text is never rebuilt from scratch inside the loop.
+    history_lines: List[str] = []
+
+    # Resolve each command's purpose line once, up front: the fallback scans
+    # the whole analysis text with built-on-the-fly regexes, and the analysis
+    # never changes between loop iterations.
+    resolved_contexts: Dict[str, str] = {}
+    for info in executable_commands:
+        if info["value"] not in resolved_contexts:
+            resolved_contexts[info["value"]] = _derive_command_context(info, response)
+
+    # We will iterate using an index to allow modification of the executable_commands list.
+    # The length is tracked in n_cmds and bumped on insertion rather than
+    # re-measured at every use inside the loop.
     current_command_index = 0
-    while current_command_index < len(executable_commands):
+    n_cmds = len(executable_commands)
+    while current_command_index < n_cmds:
         # Get the current command info from the potentially modified list
         cmd_info = executable_commands[current_command_index]
         cmd_str = cmd_info["value"]
-        cmd_context = cmd_info.get("context", "").strip()
-        # 1. Prefer context from item itself if meaningful
-        # 2. If context is missing, generic, or a placeholder, try to extract from initial LLM analysis
-        if not cmd_context or cmd_context.lower() in ("no context provided.", "no context found.", "*", "", None):
-            # Try to extract a relevant purpose from the initial LLM response (the analysis)
-            # We'll look for the closest paragraph or sentence mentioning this command
-            import re
-            # Find all command blocks and their explanations in the LLM analysis
-            pattern = re.compile(r"([^.\n]*?)(?:\n|\.)?\s*\u2022?\s*\\*\\*\\* ?" + re.escape(cmd_str) + r" ?\\*\\*\\*", re.IGNORECASE)
-            match = pattern.search(response)
-            if match and match.group(1).strip():
-                cmd_context = match.group(1).strip()
-            else:
-                # Fallback: look for any paragraph mentioning the command
-                para_pattern = re.compile(r"([^.\n]*?\b" + re.escape(cmd_str.split()[0]) + r"\b[^.\n]*[.\n])", re.IGNORECASE)
-                para_match = para_pattern.search(response)
-                if para_match and para_match.group(1).strip():
-                    cmd_context = para_match.group(1).strip()
-                else:
-                    cmd_context = "No purpose provided by LLM."
+        cmd_context = resolved_contexts.get(cmd_str)
+        if cmd_context is None: # Command appended mid-loop (SUGGEST_NEW)
+            cmd_context = _derive_command_context(cmd_info, response)
+            resolved_contexts[cmd_str] = cmd_context
 
-        print_info(f"\n➡️ Executing Step {current_command_index + 1} / {len(executable_commands)}: `{cmd_str}`")
+        print_info(f"\n➡️ Executing Step {current_command_index + 1} / {n_cmds}: `{cmd_str}`")
         print_info(f"   Purpose: {cmd_context}")
 
         # Prevent infinite loop: check if this command was already executed
-        if cmd_str in session_command_history:
+        if cmd_str in executed_command_set:
             print_warning(f"Command `{cmd_str}` has already been executed in this session. Stopping to prevent a loop.")
             break
-        session_command_history.append(cmd_str)
+        executed_command_set.add(cmd_str)
+        history_lines.append(f"- `{cmd_str}`")
 
         # --- Pre-execution check (Windows - Optional but Recommended) ---
         can_run = True
-        if platform.system() == "Windows":
+        if _IS_WINDOWS:
             # Extract first word as potential command name
             try:
                  # Use shlex to handle quoted first args correctly
-                 potential_cmd_name = shlex.split(cmd_str)[0]
+                 potential_cmd_name = _split_command(cmd_str)[0]
             except:
                  potential_cmd_name = cmd_str.split()[0] # Fallback
 
-            # List of common built-ins or commands usually found directly
-            known_builtins = ['cmd', 'powershell', 'ren', 'copy', 'del', 'dir', 'move', 'rd', 'md', 'echo', 'set', 'net', 'chkdsk', 'regsvr32', 'sfc', 'wmic', 'tasklist', 'ipconfig', 'systeminfo', 'driverquery', 'where', 'start', 'msinfo32', 'dxdiag', 'devmgmt.msc', 'eventvwr.msc', 'services.msc', 'taskmgr', 'perfmon', 'winver', 'control', 'mdsched.exe']
             # Check if it's not a known builtin and doesn't contain path separators
-            if potential_cmd_name.lower() not in known_builtins and '\\' not in potential_cmd_name and '/' not in potential_cmd_name:
-                print_info(f"Checking if '{potential_cmd_name}' exists using 'where'...")
-                # Use run_command itself to check, suppress confirmation for this check
-                where_result = run_command(['where', potential_cmd_name], capture_output=True, shell=False, require_confirmation=False)
-                if not where_result["success"]:
-                    print_warning(f"Command or executable '{potential_cmd_name}' not found via 'where'. It might be a typo, not in PATH, or require installation.")
+            if potential_cmd_name.lower() not in _KNOWN_BUILTINS and '\\' not in potential_cmd_name and '/' not in potential_cmd_name:
+                # Memoized PATH lookup: no subprocess, and repeats of the same
+                # command name within a session are free.
+                found_path = which_cached(potential_cmd_name)
+                if not found_path:
+                    print_warning(f"Command or executable '{potential_cmd_name}' not found on PATH. It might be a typo, not in PATH, or require installation.")
                     if RICH_AVAILABLE and Confirm:
                         try_anyway = Confirm.ask("Attempt to run the command anyway (it might be a shell builtin or use a full path)?", default=False)
                     else:
                         try_anyway = input("Attempt to run anyway? [y/N]: ").lower().strip() == 'y'
 
                     if not try_anyway:
-                         log_action("command_skipped", {"command": cmd_str, "reason": "Not found by 'where', user skipped"}, success=False)
+                         log_action("command_skipped", {"command": cmd_str, "reason": "Not found on PATH, user skipped"}, success=False)
                          can_run = False
                          # Skip this command and move to the next one in the list
                          current_command_index += 1
                          continue # Go to the next iteration of the while loop
                 else:
-                    found_path = where_result['output'].strip().splitlines()[0] if where_result.get('output') else 'Path not parsed'
                     print_info(f"'{potential_cmd_name}' found at: {found_path}")
         # --- End Pre-execution check ---
 
@@ -1655,13 +2596,13 @@ def handle_llm_response(response: str, problem_description: str, model: str) ->
         try:
             # If pipes, redirection, or complex shell ops are detected, consider shell=True
             # Also check for environment variables (%var%) which often need shell expansion on Windows
-            if any(op in cmd_str for op in ['|', '>', '<', '&&', '||']) or ('%' in cmd_str and platform.system() == "Windows"):
+            if any(op in cmd_str for op in ['|', '>', '<', '&&', '||']) or ('%' in cmd_str and _IS_WINDOWS):
                  use_shell = True
                  cmd_list_or_str = cmd_str # Pass raw string to shell
                  print_warning(f"Using shell=True for command: `{cmd_str}` (due to operators or '%')")
             else:
                 # Use shlex for robust splitting, handling quotes etc.
-                cmd_list_or_str = shlex.split(cmd_str)
+                cmd_list_or_str = list(_split_command(cmd_str))
                 use_shell = False # Prefer shell=False if possible
         except ValueError as e:
             # shlex might fail on complex/malformed commands (e.g., unmatched quotes)
@@ -1679,124 +2620,118 @@ def handle_llm_response(response: str, problem_description: str, model: str) ->
         )
 
         # Log command execution attempt to session history *regardless* of execution status for context
-        session_command_history.append({
-             "command": cmd_str,
-             "executed": result["executed"], # Track if it ran
-             "confirmed": result["confirmed"], # Track if user confirmed
-             "success": result["success"],
-             "output": result.get("output", ""),
-             "error": result.get("error", ""),
-             "return_code": result.get("return_code")
-        })
+        session_command_history.append(CommandRecord(
+             command=cmd_str,
+             executed=result["executed"], # Track if it ran
+             confirmed=result["confirmed"], # Track if user confirmed
+             success=result["success"],
+             output=result.get("output", ""),
+             error=result.get("error", ""),
+             return_code=result.get("return_code")
+        ))
 
         # Update persistent memory only if it was actually executed
         if result["executed"]:
             memory = add_to_memory_list(memory, "command_history", {
-                "timestamp": datetime.datetime.now().isoformat(),
+                "timestamp": _now_iso(),
                 "command": cmd_str, # Log the original string
                 "success": result["success"],
                 "return_code": result.get("return_code", None)
-            })
-            save_memory(memory) # Save after each command
+            }) # add_to_memory_list already schedules the (debounced) save
 
         # --- Intermediate Analysis ---
         if result["executed"]: # Only analyze if it actually ran
+            # Bind the result fields once; display and LLM context below both
+            # truncate from these instead of re-fetching per use.
+            cmd_output = result.get("output", "")
+            cmd_error = result.get("error", "")
+            cmd_rc = result.get("return_code", "N/A")
+            # Truncate to display size once; the 500-char LLM contexts below
+            # are cut from these already-short strings, so a huge output is
+            # sliced a single time.
+            output_display = _truncate(cmd_output)
+            error_display = _truncate(cmd_error) if cmd_error else ""
+
+            # Decide on intermediate analysis *before* printing the result:
+            # analyze if the command failed OR it wasn't the last planned one
+            # (no need to analyze after the very last command *succeeds*).
+            # With Rich the request goes to the background worker here so
+            # inference runs while the result is rendered below; plain mode
+            # streams tokens to stdout, so it stays inline to keep ordering.
+            is_last_command = (current_command_index == n_cmds - 1)
+            intermediate_prompt = None
+            analysis_future = None
+            if not result["success"] or not is_last_command:
+                history_summary = "\n".join(history_lines)
+                next_planned_command_str = "None (this was the last planned step)"
+                if current_command_index + 1 < n_cmds:
+                    next_planned_command_str = f"`{executable_commands[current_command_index + 1]['value']}`"
+
+                # Limit context size passed to LLM
+                output_context = _truncate(output_display, 500)
+                error_context = _truncate(error_display, 500)
+
+                intermediate_prompt = _INTERMEDIATE_PROMPT_TMPL.format_map({
+                    "problem_description": problem_description,
+                    "history_summary": history_summary,
+                    "cmd_str": cmd_str,
+                    "executed": result['executed'],
+                    "confirmed": result['confirmed'],
+                    "success": result['success'],
+                    "return_code": cmd_rc,
+                    "output_context": output_context if _nonempty(output_context) else '(empty)',
+                    "error_context": error_context if _nonempty(error_context) else '(empty)',
+                    "next_planned_command_str": next_planned_command_str,
+                })
+                # Inference can take tens of seconds; make the recorded step
+                # durable before blocking on it.
+                flush_memory()
+                if RICH_AVAILABLE:
+                    analysis_future = _llm_pool.submit(ask_llm, intermediate_prompt, model)
+
             if result["success"]:
                 print_success(f"Command `{cmd_str}` completed successfully.")
-                # Truncate output for display and LLM context
-                output_display = (result.get("output", "")[:1000] + "..." if len(result.get("output", "")) > 1000 else result.get("output", "(No output)"))
                 print_info("Output (truncated):")
-                print(output_display if output_display.strip() else "(No output)")
+                print(output_display if _nonempty(output_display) else "(No output)")
             else:
-                print_error(f"Command `{cmd_str}` failed (Return Code: {result.get('return_code', 'N/A')}).")
-                error_display = ""
+                print_error(f"Command `{cmd_str}` failed (Return Code: {cmd_rc}).")
                 # Prioritize showing stderr if it exists
-                if result.get("error"):
-                    error_display = result["error"][:1000] + ("..." if len(result["error"]) > 1000 else "")
+                if cmd_error:
                     print_error("Error Output (stderr, truncated):")
-                    print(error_display if error_display.strip() else "(No stderr output)")
+                    print(error_display if _nonempty(error_display) else "(No stderr output)")
                 # Show stdout if stderr is empty, as errors might go there
-                elif result.get("output"):
-                     output_display = result.get("output", "")[:1000] + ("..." if len(result.get("output", "")) > 1000 else "")
+                elif cmd_output:
                      print_warning("Output (stdout, potentially contains error details, truncated):")
-                     print(output_display if output_display.strip() else "(No stdout output)")
-                     if not error_display.strip(): error_display = output_display # Use stdout for LLM context if stderr was empty
+                     print(output_display if _nonempty(output_display) else "(No stdout output)")
+                     if not _nonempty(error_display): error_display = output_display # Use stdout for LLM context if stderr was empty
 
 
-            # Decide if intermediate analysis is needed
-            is_last_command = (current_command_index == len(executable_commands) - 1)
-
-            # Analyze if command failed OR if it's not the last planned command
-            # (No need to analyze after the very last command *succeeds* unless you want a final summary)
-            if not result["success"] or not is_last_command:
+            if intermediate_prompt is not None:
                 print_info("\n🧠 Asking LLM for analysis of the last step...")
 
-                # Prepare context for the LLM
-                history_summary = "\n".join([f"- `{cmd}`" for cmd in session_command_history])
-                next_planned_command_str = "None (this was the last planned step)"
-                if current_command_index + 1 < len(executable_commands):
-                    next_planned_command_str = f"`{executable_commands[current_command_index + 1]['value']}`"
-
-                # Limit context size passed to LLM
-                output_context = result.get("output", "")[:500] + ('...' if len(result.get("output", "")) > 500 else '')
-                error_context = result.get("error", "")[:500] + ('...' if len(result.get("error", "")) > 500 else '')
-
-
-                # Construct the prompt for intermediate analysis
-                intermediate_prompt = f"""
-Context: We are troubleshooting the problem: "{problem_description}"
-
-History of commands executed in *this session* so far:
-{history_summary}
-
-The *last* command attempted was:
-`{cmd_str}`
-
-Result:
-- Executed: {result['executed']}
-- Confirmed by user: {result['confirmed']}
-- Success: {result['success']}
-- Return Code: {result.get('return_code', 'N/A')}
-- Output/Error (truncated to 500 chars):
-Output: ```{output_context if output_context.strip() else '(empty)'}```
-Error: ```{error_context if error_context.strip() else '(empty)'}```
-
-Next *originally planned* command is: {next_planned_command_str}
-
-**Your Task:**
-1.  Analyze the outcome of the last command (`{cmd_str}`). What does this result tell us in the context of the problem and history? Consider both success/failure and the output/error content.
-2.  Based *only* on this outcome and the history, decide the best next step:
-    a.  **Proceed:** Continue with the next planned command ({next_planned_command_str}). Is it still relevant and safe given the last result?
-    b.  **Suggest New:** The current plan seems flawed or a better step is indicated by the last result. Suggest the *single* next command to try using the format [[*** new_command_here ***]]. Explain why this new command is better than proceeding.
-    c.  **Stop/Ask:** The plan needs rethinking, requires manual user action (like interpreting GUI output from msinfo32, checking BIOS), or the last error is critical and needs specific user attention. Recommend stopping the automated sequence.
-
-Provide a *brief* explanation for your recommendation (1-2 sentences).
-**Start your response clearly with ONE of the keywords:** `PROCEED`, `SUGGEST_NEW`, or `STOP`.
-
-Example Response (Proceed):
-PROCEED. The 'where' command found chkdsk, so running it is the correct next step.
-
-Example Response (Suggest New):
-SUGGEST_NEW. The chkdsk command failed with access denied. Let's try running sfc /scannow first to check system files before retrying chkdsk. [[*** sfc /scannow ***]]
-
-Example Response (Stop):
-STOP. The driverquery output shows very old drivers. The user should manually check the manufacturer website for updates before we continue.
-"""
-                # Call the LLM for intermediate analysis
-                analysis_response = ask_llm(intermediate_prompt, model)
+                # Collect (or, in plain mode, run) the intermediate analysis
+                if analysis_future is not None:
+                    analysis_response = analysis_future.result()
+                else:
+                    analysis_response = ask_llm(intermediate_prompt, model)
 
                 next_action = "stop" # Default action if LLM fails or is unclear
 
                 if analysis_response:
                     print_info("\nLLM Intermediate Analysis:")
-                    print_md(analysis_response)
-
-                    # Determine LLM's recommended action based on keywords at the start of the response
-                    response_lower_strip = analysis_response.lower().strip()
-                    if response_lower_strip.startswith("proceed"):
+                    # In plain mode the inline ask_llm call above already
+                    # streamed the tokens; re-printing would duplicate them.
+                    if RICH_AVAILABLE:
+                        print_md(analysis_response)
+
+                    # Determine LLM's recommended action based on keywords at
+                    # the start of the response. Only the head matters, so
+                    # lowercase 32 chars instead of copying the whole reply.
+                    response_head = analysis_response.lstrip()[:32].lower()
+                    if response_head.startswith("proceed"):
                         next_action = "proceed"
                         print_info("LLM recommends proceeding with the original plan.")
-                    elif response_lower_strip.startswith("suggest_new"):
+                    elif response_head.startswith("suggest_new"):
                         # Try extracting command only if action is SUGGEST_NEW
                         new_commands = extract_commands_from_llm_response(analysis_response)
                         if new_commands:
@@ -1806,7 +2741,7 @@ STOP. The driverquery output shows very old drivers. The user should manually ch
                         else:
                             print_warning("LLM said 'SUGGEST_NEW' but didn't provide a command like [[*** ... ***]]. Stopping.")
                             next_action = "stop"
-                    elif response_lower_strip.startswith("stop"):
+                    elif response_head.startswith("stop"):
                          next_action = "stop"
                          print_warning("LLM recommends stopping the current automated sequence.")
                     else:
@@ -1834,6 +2769,7 @@ STOP. The driverquery output shows very old drivers. The user should manually ch
                          # The rest of the original plan remains after the injected command
                          print_info(f"Inserting new step suggested by LLM: `{new_cmd_info['value']}`")
                          executable_commands.insert(current_command_index + 1, new_cmd_info)
+                         n_cmds += 1
                          # No need to update command_indices_map as we only care about the sequence now
                          current_command_index += 1 # Move index to the newly inserted command for next iteration
                          continue # Continue loop to run the new command
@@ -1857,16 +2793,18 @@ STOP. The driverquery output shows very old drivers. The user should manually ch
             print_warning(f"Command `{cmd_str}` was not executed by user choice. Stopping execution sequence.")
             break # Exit the while loop
 
-    # End of while loop
+    # End of while loop; flush any command-history entries still pending
+    # from the debounced saves above
+    flush_memory()
     print_info("\n--- Finished Interactive Command Execution ---")
-    if current_command_index < len(executable_commands) and proceed: # Check if loop was broken early
+    if current_command_index < n_cmds and proceed: # Check if loop was broken early
         print_warning("Execution sequence was stopped before completing all planned steps.")
 
     # Print a summary of executed commands
-    if session_command_history:
+    if history_lines:
         print_info("\nSummary of executed commands:")
-        for cmd in session_command_history:
-            print_info(f"- `{cmd}`")
+        for line in history_lines:
+            print_info(line)
 
 
 def handle_problem_description(memory: Dict[str, Any], system_report: Dict[str, Any],
@@ -1912,7 +2850,7 @@ def handle_problem_description(memory: Dict[str, Any], system_report: Dict[str,
 
     # Store the described issue in memory *before* analysis starts
     issue = {
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "description": problem,
         "resolved": False # Default to unresolved when first described
     }
@@ -1946,6 +2884,22 @@ def handle_problem_description(memory: Dict[str, Any], system_report: Dict[str,
         print_info("You can still use the interactive mode to manually run commands ('run: your command') or tools ('execute toolname').")
         return None # No analysis performed
 
+# Windows tools the 'execute' command may launch directly, plus the support
+# strings derived from it -- built once instead of per keystroke.
+_WINDOWS_COMMANDS = {
+    "msinfo32": "System Information Tool",
+    "dxdiag": "DirectX Diagnostic Tool",
+    "devmgmt.msc": "Device Manager",
+    "eventvwr.msc": "Event Viewer",
+    "services.msc": "Services Manager",
+    "taskmgr": "Task Manager",
+    "perfmon": "Performance Monitor",
+    "winver": "Windows Version Info",
+    "control": "Control Panel"
+}
+_WINDOWS_COMMANDS_DISPLAY = ", ".join(_WINDOWS_COMMANDS)
+
+
 def interactive_mode(memory: Dict[str, Any], system_report: Dict[str, Any], model: str) -> None:
     """Start interactive mode for continued conversation and command execution."""
     print_info("Entering interactive mode. You can:")
@@ -2007,7 +2961,7 @@ def interactive_mode(memory: Dict[str, Any], system_report: Dict[str, Any], mode
             image_paths = memory.get("image_paths", [])
             if image_paths:
                 try:
-                    response = llm_client.chat(
+                    response = get_llm_client().chat(
                         model=model,
                         messages=[{
                             'role': 'user',
@@ -2088,7 +3042,7 @@ Keep your analysis concise and focused on actionable insights.
                     # Add to command history
                     if result["executed"]:
                         memory = add_to_memory_list(memory, "command_history", {
-                            "timestamp": datetime.datetime.now().isoformat(),
+                            "timestamp": _now_iso(),
                             "command": " ".join(cmd),
                             "success": result["success"]
                         })
@@ -2103,9 +3057,8 @@ Keep your analysis concise and focused on actionable insights.
                 continue
             
             # Split command into list, respecting quotes
-            import shlex
             try:
-                cmd_list = shlex.split(cmd)
+                cmd_list = list(_split_command(cmd))
                 # Execute with confirmation
                 result = run_command(
                     cmd_list,
@@ -2121,7 +3074,7 @@ Keep your analysis concise and focused on actionable insights.
                 # Add to command history
                 if result["executed"]:
                     memory = add_to_memory_list(memory, "command_history", {
-                        "timestamp": datetime.datetime.now().isoformat(),
+                        "timestamp": _now_iso(),
                         "command": cmd,
                         "success": result["success"]
                     })
@@ -2136,36 +3089,30 @@ Keep your analysis concise and focused on actionable insights.
                 continue
             
             # Windows commands that can be executed directly
-            windows_commands = {
-                "msinfo32": "System Information Tool",
-                "dxdiag": "DirectX Diagnostic Tool",
-                "devmgmt.msc": "Device Manager",
-                "eventvwr.msc": "Event Viewer",
-                "services.msc": "Services Manager",
-                "taskmgr": "Task Manager",
-                "perfmon": "Performance Monitor",
-                "winver": "Windows Version Info",
-                "control": "Control Panel"
-            }
-            
-            if cmd.lower() in windows_commands:
-                print_info(f"Executing {windows_commands[cmd.lower()]}...")
+            tool_description = _WINDOWS_COMMANDS.get(cmd.lower())
+            if tool_description:
+                print_info(f"Executing {tool_description}...")
                 try:
-                    import os
-                    os.system(f"start {cmd}")
+                    if _IS_WINDOWS:
+                        # ShellExecute launches the tool (including .msc
+                        # snap-ins) directly -- no intermediate cmd.exe just
+                        # to interpret the 'start' builtin
+                        os.startfile(cmd)
+                    else:
+                        subprocess.Popen([cmd], close_fds=True)
                     print_success(f"Started {cmd}. Check for an open window.")
-                    
+
                     # Add to command history
                     memory = add_to_memory_list(memory, "command_history", {
-                        "timestamp": datetime.datetime.now().isoformat(),
-                        "command": f"start {cmd}",
+                        "timestamp": _now_iso(),
+                        "command": cmd,
                         "success": True
                     })
                 except Exception as e:
                     print_error(f"Error starting {cmd}: {e}")
             else:
                 print_error(f"Unknown or unsupported Windows command: {cmd}")
-                print_info("Supported commands: " + ", ".join(windows_commands.keys()))
+                print_info("Supported commands: " + _WINDOWS_COMMANDS_DISPLAY)
         
         else:
             # Treat as a follow-up question
@@ -2199,32 +3146,37 @@ def extract_commands_from_llm_response(response: str) -> List[Dict[str, Any]]:
     Extract commands and potentially other actionable items (like URLs)
     from LLM response using special formats. Ensures 'type' key is always present.
     """
-    items = []
-    # Command format: [[*** command ***]]
-    command_pattern = r"\[\[\*\*\*\s*(.*?)\s*\*\*\*\]\]" # Added optional space trimming
-    # URL format suggestion: [[URL: url ]] (Case-insensitive)
-    url_pattern = r"\[\[URL:\s*(https?://[^\s\]]+)\s*\]\]" # More specific URL pattern
+    # Every actionable tag starts with '[['; a C-level substring probe
+    # skips both regex scans for the common PROCEED/STOP-style responses
+    # that carry no markup at all.
+    if "[[" not in response:
+        return []
+
+    # finditer yields matches in position order, so the URL and command
+    # sub-lists are each already sorted; collect them separately and merge
+    # at the end instead of a final O(N log N) sort.
+    url_items: List[Dict[str, Any]] = []
+    cmd_items: List[Dict[str, Any]] = []
 
     # --- Find URLs first ---
-    url_matches = re.finditer(url_pattern, response, re.IGNORECASE)
-    processed_indices = set() # Track processed parts of the string
+    url_matches = _URL_RE.finditer(response)
+    # Track processed URL tags as (start, end) spans -- finditer yields them
+    # in order, so the list stays sorted and overlap checks are a bisect
+    # instead of filling a set with one entry per character.
+    url_spans: List[Tuple[int, int]] = []
 
     for match in url_matches:
         url_text = match.group(1).strip()
         start_pos, end_pos = match.span()
-
-        # Mark this region as processed
-        for i in range(start_pos, end_pos):
-            processed_indices.add(i)
+        url_spans.append((start_pos, end_pos))
 
         # Basic context extraction (sentence before)
         context_start = max(0, start_pos - 200)
         context_text = response[context_start:start_pos].strip()
-        sentences = re.split(r'[.!?]\s+', context_text)
-        context = sentences[-1].strip() if sentences else context_text
+        context = _last_sentence(context_text)
 
         # Ensure dictionary structure is complete
-        items.append({
+        url_items.append({
             "type": "url", # Explicitly set type
             "value": url_text,
             "context": context if context else "No context found.",
@@ -2232,18 +3184,16 @@ def extract_commands_from_llm_response(response: str) -> List[Dict[str, Any]]:
         })
 
     # --- Find Commands, avoiding already processed URL regions ---
-    command_matches = re.finditer(command_pattern, response)
+    command_matches = _CMD_RE.finditer(response)
+    url_starts = [span[0] for span in url_spans]
 
     for match in command_matches:
         start_pos, end_pos = match.span()
 
-        # Check if this match overlaps with a processed URL region
-        is_overlapped = False
-        for i in range(start_pos, end_pos):
-            if i in processed_indices:
-                is_overlapped = True
-                break
-        if is_overlapped:
+        # Overlap check: the only URL span that can intersect this match is
+        # the last one starting before the match ends.
+        span_idx = bisect.bisect_right(url_starts, end_pos - 1)
+        if span_idx and url_spans[span_idx - 1][1] > start_pos:
             continue # Skip if it's part of a URL tag we already handled
 
         cmd_text = match.group(1).strip()
@@ -2253,21 +3203,17 @@ def extract_commands_from_llm_response(response: str) -> List[Dict[str, Any]]:
         # Context extraction
         context_start = max(0, start_pos - 200)
         context_text = response[context_start:start_pos].strip()
-        sentences = re.split(r'[.!?]\s+', context_text)
-        context = sentences[-1].strip() if sentences else context_text
+        context = _last_sentence(context_text)
 
         # --- Determine item type ---
         item_type = "command" # Default type
-        try:
-            # Use shlex.split to handle quoted commands before checking first word
-            cmd_first_word = shlex.split(cmd_text)[0].lower()
-        except Exception: # Catch shlex errors or empty strings
-             cmd_first_word = cmd_text.split()[0].lower() if cmd_text.split() else "" # Fallback
+        cmd_first_word = _first_token(cmd_text)
 
-        if platform.system() == "Windows" and cmd_first_word in ["which", "sudo", "apt", "yum", "dnf", "apt-get"]:
+        cmd_lower = cmd_text.lower() # Lowered once for both checks below
+        if _IS_WINDOWS and cmd_first_word in _NIX_CMDS:
              item_type = "invalid_command" # Mark as potentially invalid
         # Map known tools that aren't direct commands but executables
-        elif "memory diagnostic" in cmd_text.lower() or "mdsched" in cmd_text.lower():
+        elif any(token in cmd_lower for token in _MDSCHED_TOKENS):
              item_type = "command"
              cmd_text = "mdsched.exe" # Map to the actual executable
         elif not cmd_text: # Handle empty command after stripping
@@ -2276,27 +3222,23 @@ def extract_commands_from_llm_response(response: str) -> List[Dict[str, Any]]:
              cmd_text = "[EMPTY COMMAND]" # Assign placeholder value
 
         # Ensure dictionary structure is complete before appending
-        items.append({
+        cmd_items.append({
             "type": item_type, # Ensure type is always assigned
             "value": cmd_text,
             "context": context if context else "No context found.",
             "original_match_position": start_pos
         })
 
-    # --- Final Safety Check ---
-    # Although unlikely with the above logic, double-check if any item is missing 'type'
-    for i, item in enumerate(items):
-        if "type" not in item:
-             print_error(f"CRITICAL ERROR: Item at index {i} is missing 'type' key after extraction! Item: {item}")
-             # Assign a default error type to prevent crash downstream
-             item["type"] = "error"
-             item["value"] = item.get("value", "[UNKNOWN VALUE]")
-             item["context"] = item.get("context", "Extraction error occurred.")
-             item["original_match_position"] = item.get("original_match_position", -1)
-
+    # Merge the two position-sorted sub-lists in O(N); itemgetter avoids a
+    # Python-level lambda call per comparison.
+    items = list(heapq.merge(url_items, cmd_items,
+                             key=itemgetter("original_match_position")))
 
-    # Sort items based on their appearance order in the response
-    items.sort(key=lambda x: x["original_match_position"])
+    # Every append above sets "type" in its dict literal, so the invariant
+    # holds by construction; assert it in debug builds only instead of
+    # re-scanning and patching the list on every call (vanishes under -O).
+    if __debug__:
+        assert all("type" in item for item in items), "extracted item missing 'type' key"
 
     return items
 
@@ -2324,6 +3266,8 @@ def handle_system_scan() -> Dict[str, Any]:
     """Perform a system scan and return the report."""
     print_info("Starting system scan. This will collect information about your system for diagnosis...")
     report = generate_system_report()
+    # Pre-warm the log-pattern analysis so every later consumer shares it
+    _get_log_patterns(report)
     print_success("System scan completed.")
     return report
 
@@ -2331,60 +3275,10 @@ def handle_system_scan() -> Dict[str, Any]:
 # LLM Auto Health Report
 # =============================================================================
 
-def llm_auto_health_report(system_report: dict, model: str) -> None:
-    """
-    Generate and display a proactive LLM health report based on system and log status, before user input.
-    """
-    logs = system_report.get("recent_logs", [])
-    log_patterns = analyze_logs_for_patterns(logs)
-
-    # Format log patterns for LLM consumption
-    patterns_text = ""
-    if log_patterns.get("suspicious_apps"):
-        patterns_text += f"- Suspicious applications mentioned: {', '.join(log_patterns['suspicious_apps'])}\n"
-    if log_patterns.get("app_crashes"):
-        patterns_text += f"- Application crash events detected: {len(log_patterns['app_crashes'])}\n"
-    if log_patterns.get("service_failures"):
-        patterns_text += f"- Service failure events detected: {len(log_patterns['service_failures'])}\n"
-    if log_patterns.get("driver_issues"):
-        patterns_text += f"- Potential driver issue events detected: {len(log_patterns['driver_issues'])}\n"
-    if log_patterns.get("permission_errors"):
-        patterns_text += f"- Permission error events detected: {len(log_patterns['permission_errors'])}\n"
-    if log_patterns.get("disk_errors"):
-        patterns_text += f"- Potential disk error events detected: {len(log_patterns['disk_errors'])}\n"
-    if log_patterns.get("frequent_sources"):
-        top_sources = list(log_patterns["frequent_sources"].items())[:5]
-        patterns_text += "- Most frequent error/warning sources:\n"
-        for source, data in top_sources:
-            levels = ', '.join(data['levels'])
-            patterns_text += f"  - {source}: {data['count']} occurrences (Levels: {levels})\n"
-    if log_patterns.get("error_clusters"):
-        patterns_text += "- Significant error clusters (time periods with high error counts):\n"
-        for cluster in log_patterns["error_clusters"][:3]:
-            patterns_text += f"  - {cluster['count']} errors between {cluster['start']} and {cluster['end']}\n"
-    if not patterns_text:
-        patterns_text = "No specific error patterns detected in the analyzed logs."
-
-    # Format a sample of logs for context
-    logs_text = ""
-    if logs:
-        logs_text = "**Recent System Logs (up to 15 most recent errors/warnings/critical):**\n"
-        logs_text += "\n".join(
-            f"- [{log.get('TimeCreated', 'N/A')}] Lvl: {log.get('Level', 'N/A')} Src: {log.get('ProviderName', 'N/A')} ID: {log.get('Id','N/A')} | {log.get('Message', 'N/A')}"
-            for log in logs[:15]
-        )
-    else:
-        logs_text = "**Recent System Logs:**\nNo recent system logs found or collected."
-
-    # OS information
-    os_info = system_report.get("os_info", {})
-    os_name = os_info.get('OS Name', os_info.get('system', 'Unknown'))
-    os_version = os_info.get('OS Version', os_info.get('version', 'Unknown'))
-    os_arch = os_info.get('System Type', os_info.get('architecture', 'Unknown'))
-    os_info_text = f"OS: {os_name} {os_version} ({os_arch})"
-
-    # Compose the health report prompt
-    prompt = f"""
+# Prompt bodies hoisted to module scope and parsed once; .format fills the
+# slots at call time instead of re-evaluating a triple-quoted f-string's
+# formatting bytecode on every report.
+_HEALTH_PROMPT_TMPL = """
 You are an expert PC troubleshooting assistant running locally on the user's machine.
 
 The following is a summary of the current system and log status. The user has NOT yet described any specific problem. Based on the information below, provide:
@@ -2397,8 +3291,8 @@ The following is a summary of the current system and log status. The user has NO
 ---
 📊 **System Information:**
 {os_info_text}
-{('Motherboard: '+ system_report.get('hardware_info', {}).get('Motherboard', {}).get('Manufacturer', '') + ' ' + system_report.get('hardware_info', {}).get('Motherboard', {}).get('Product', '')) if system_report.get('hardware_info', {}).get('Motherboard') else ''}
-{('CPU: '+ system_report.get('hardware_info', {}).get('CPU', {}).get('Name', 'N/A')) if system_report.get('hardware_info', {}).get('CPU') else ''}
+{mobo_line}
+{cpu_line}
 
 ---
 📉 **Log Analysis Patterns:**
@@ -2415,17 +3309,130 @@ The following is a summary of the current system and log status. The user has NO
 4. Do NOT ask the user for a problem description yet. Just report your findings.
 """
 
+def llm_auto_health_report(system_report: dict, model: str) -> None:
+    """
+    Generate and display a proactive LLM health report based on system and log status, before user input.
+    """
+    logs = system_report.get("recent_logs", [])
+    log_patterns = _get_log_patterns(system_report)
+
+    # Format log patterns for LLM consumption (shared formatter, list+join
+    # under the hood instead of repeated string concatenation)
+    patterns_text = _format_log_patterns(log_patterns)
+    if not patterns_text:
+        patterns_text = "No specific error patterns detected in the analyzed logs."
+
+    # Format a sample of logs for context
+    if logs:
+        logs_text = ("**Recent System Logs (up to 15 most recent errors/warnings/critical):**\n"
+                     + _format_log_lines(logs))
+    else:
+        logs_text = "**Recent System Logs:**\nNo recent system logs found or collected."
+
+    # OS information
+    os_info = system_report.get("os_info", {})
+    os_name = os_info.get('OS Name', os_info.get('system', 'Unknown'))
+    os_version = os_info.get('OS Version', os_info.get('version', 'Unknown'))
+    os_arch = os_info.get('System Type', os_info.get('architecture', 'Unknown'))
+    os_info_text = f"OS: {os_name} {os_version} ({os_arch})"
+
+    # Hardware lines: walk the nested report dicts once instead of repeating
+    # the same .get() chains several times inside the prompt template.
+    hw = system_report.get("hardware_info", {}) or {}
+    mobo = hw.get("Motherboard", {}) or {}
+    cpu = hw.get("CPU", {}) or {}
+    mobo_line = f"Motherboard: {mobo.get('Manufacturer', '')} {mobo.get('Product', '')}" if mobo else ""
+    cpu_line = f"CPU: {cpu.get('Name', 'N/A')}" if cpu else ""
+
+    # Compose the health report prompt from the module-level template
+    prompt = _HEALTH_PROMPT_TMPL.format(
+        os_info_text=os_info_text, mobo_line=mobo_line, cpu_line=cpu_line,
+        patterns_text=patterns_text, logs_text=logs_text)
+
     # Query the LLM and display the result
     print_info("\n[LLM] Analyzing system status and logs for a proactive health report...")
     analysis = ask_llm(prompt, model, system_message="You are a helpful and cautious PC diagnostic assistant providing a proactive health report.")
     if analysis:
-        print_md("\n[LLM SYSTEM HEALTH REPORT]\n" + analysis)
+        # Plain mode already streamed the report while ask_llm ran
+        if RICH_AVAILABLE:
+            print_md("\n[LLM SYSTEM HEALTH REPORT]\n" + analysis)
     else:
         print_warning("LLM did not return a health report.")
 
 # =============================================================================
 # Stepwise LLM Health Report (Modular, Memory-based)
 # =============================================================================
+
+# Per-step prompt templates, parsed once at import (same rationale as
+# _HEALTH_PROMPT_TMPL above).
+_STEP_LOGS_PROMPT_TMPL = """
+            You are a PC diagnostic assistant. Here are recent system event logs. Summarize any critical errors, warnings, or notable patterns. Be concise and actionable.\n\nLogs:\n{logs_text}"
+            """
+_STEP_PATTERNS_PROMPT_TMPL = """
+            You are a PC diagnostic assistant. Here are detected log patterns. Summarize their health significance and any urgent findings.\n\nPatterns:\n{patterns_text}"
+            """
+_STEP_DATA_PROMPT_TMPL = """
+            You are a PC diagnostic assistant. Here is {title} data. Summarize any health risks or important findings.\n\nData:\n{data}"
+            """
+_FINAL_SYNTH_PROMPT_TMPL = """
+    You are a PC troubleshooting assistant. Here are stepwise health summaries from different diagnostic checks. Synthesize them into a single, holistic health report. Highlight urgent issues, cross-reference findings, and provide clear recommendations.\n\n{all_summaries_text}\n\nRespond in Markdown."
+    """
+
+# Bound for the content-addressed step-summary cache kept in memory["llm_step_cache"].
+_STEP_CACHE_MAX = 64
+
+def _step_cache_key(title: str, raw_data: Any) -> str:
+    """Content hash for one diagnostic step's input data.
+
+    sort_keys makes the serialization deterministic so unchanged system data
+    hashes identically across runs; default=str absorbs the odd non-JSON
+    value (sets, datetimes) rather than failing the whole cache lookup.
+    """
+    serialized = json.dumps(raw_data, sort_keys=True, default=str)
+    return hashlib.sha256((title + serialized).encode("utf-8")).hexdigest()
+
+def _step_cache_put(step_cache: Dict[str, str], key: str, summary: str) -> None:
+    """Insert a summary, evicting oldest entries past the cache bound.
+
+    Dicts preserve insertion order, so the first key is always the oldest —
+    no separate order-tracking list needed.
+    """
+    step_cache[key] = summary
+    while len(step_cache) > _STEP_CACHE_MAX:
+        del step_cache[next(iter(step_cache))]
+
+def _build_step_prompt(title: str, raw_data: Any) -> str:
+    """Format the LLM prompt for one diagnostic step."""
+    if title == "Event Logs":
+        logs = raw_data
+        logs_text = _format_log_lines(logs) if logs else "No recent logs."
+        return _STEP_LOGS_PROMPT_TMPL.format(logs_text=logs_text)
+    if title == "Log Patterns":
+        patterns = raw_data
+        # Short-form pattern bullets; list+join instead of string +=
+        pattern_parts = []
+        if patterns.get("suspicious_apps"):
+            pattern_parts.append(f"- Suspicious applications: {', '.join(patterns['suspicious_apps'])}\n")
+        if patterns.get("app_crashes"):
+            pattern_parts.append(f"- Application crashes: {len(patterns['app_crashes'])}\n")
+        if patterns.get("service_failures"):
+            pattern_parts.append(f"- Service failures: {len(patterns['service_failures'])}\n")
+        if patterns.get("driver_issues"):
+            pattern_parts.append(f"- Driver issues: {len(patterns['driver_issues'])}\n")
+        if patterns.get("permission_errors"):
+            pattern_parts.append(f"- Permission errors: {len(patterns['permission_errors'])}\n")
+        if patterns.get("disk_errors"):
+            pattern_parts.append(f"- Disk errors: {len(patterns['disk_errors'])}\n")
+        patterns_text = "".join(pattern_parts)
+        if not patterns_text:
+            patterns_text = "No notable log patterns."
+        return _STEP_PATTERNS_PROMPT_TMPL.format(patterns_text=patterns_text)
+    # Compact serialization via the shared orjson-aware helper: the pretty
+    # printer's indentation is pure padding to the model and every extra
+    # prompt token costs inference time.
+    return _STEP_DATA_PROMPT_TMPL.format(title=title,
+                                         data=_json_dumps(raw_data).decode('utf-8'))
+
 def stepwise_auto_health_report(system_report: dict, model: str, memory: dict) -> None:
     """
     Run each diagnostic step, summarize with LLM, store intermediate summaries, and then synthesize a final health report.
@@ -2435,72 +3442,101 @@ def stepwise_auto_health_report(system_report: dict, model: str, memory: dict) -
         ("Hardware Info", lambda: system_report.get("hardware_info", {})),
         ("Network Info", lambda: system_report.get("network_info", {})),
         ("Event Logs", lambda: system_report.get("recent_logs", [])),
-        ("Log Patterns", lambda: analyze_logs_for_patterns(system_report.get("recent_logs", []))),
+        ("Log Patterns", lambda: _get_log_patterns(system_report)),
     ]
     intermediate_summaries = []
     total_steps = len(diagnostic_steps)
 
-    for idx, (title, func) in enumerate(diagnostic_steps, 1):
-        print_step(f"Stepwise Diagnostic: {title}", f"Running {title}...", idx, total_steps)
+    # Content-addressed summary cache: the LLM call is seconds of pure I/O
+    # per step, and within a session the underlying system data rarely
+    # changes between runs. Hash each step's raw input and reuse the stored
+    # summary on a hit -- skipping both the prompt assembly and the LLM call.
+    step_cache = memory.setdefault("llm_step_cache", {})
+
+    # Phase 1 -- assemble each step's input, content hash and (on cache miss)
+    # its prompt. All cheap, local work.
+    prepared: List[Tuple[str, str, Optional[str], Optional[str]]] = []
+    for title, func in diagnostic_steps:
         raw_data = func()
-        # Format the prompt for the LLM for each step
-        if title == "Event Logs":
-            logs = raw_data
-            logs_text = "\n".join(
-                f"- [{log.get('TimeCreated', 'N/A')}] Lvl: {log.get('Level', 'N/A')} Src: {log.get('ProviderName', 'N/A')} ID: {log.get('Id','N/A')} | {log.get('Message', 'N/A')}"
-                for log in logs[:15]
-            ) if logs else "No recent logs."
-            prompt = f"""
-            You are a PC diagnostic assistant. Here are recent system event logs. Summarize any critical errors, warnings, or notable patterns. Be concise and actionable.\n\nLogs:\n{logs_text}"
-            """
-        elif title == "Log Patterns":
-            patterns = raw_data
-            patterns_text = ""
-            if patterns.get("suspicious_apps"):
-                patterns_text += f"- Suspicious applications: {', '.join(patterns['suspicious_apps'])}\n"
-            if patterns.get("app_crashes"):
-                patterns_text += f"- Application crashes: {len(patterns['app_crashes'])}\n"
-            if patterns.get("service_failures"):
-                patterns_text += f"- Service failures: {len(patterns['service_failures'])}\n"
-            if patterns.get("driver_issues"):
-                patterns_text += f"- Driver issues: {len(patterns['driver_issues'])}\n"
-            if patterns.get("permission_errors"):
-                patterns_text += f"- Permission errors: {len(patterns['permission_errors'])}\n"
-            if patterns.get("disk_errors"):
-                patterns_text += f"- Disk errors: {len(patterns['disk_errors'])}\n"
-            if not patterns_text:
-                patterns_text = "No notable log patterns."
-            prompt = f"""
-            You are a PC diagnostic assistant. Here are detected log patterns. Summarize their health significance and any urgent findings.\n\nPatterns:\n{patterns_text}"
-            """
-        else:
-            prompt = f"""
-            You are a PC diagnostic assistant. Here is {title} data. Summarize any health risks or important findings.\n\nData:\n{json.dumps(raw_data, indent=2)}"
-            """
-        step_summary = ask_llm(prompt, model, system_message=f"You are a helpful PC diagnostic assistant. Summarize {title} for a health report.")
-        if step_summary:
-            print_md(f"\n[LLM SUMMARY: {title}]\n" + step_summary)
-            intermediate_summaries.append({"step": title, "summary": step_summary})
-        else:
-            print_warning(f"LLM did not return a summary for {title}.")
-            intermediate_summaries.append({"step": title, "summary": "No summary returned."})
-        # Save each intermediate summary to memory
-        memory = add_to_memory_list(memory, "health_report_summaries", {"step": title, "summary": step_summary}, max_items=10)
-        save_memory(memory)
+        cache_key = _step_cache_key(title, raw_data)
+        step_summary = step_cache.get(cache_key)
+        prompt = None if step_summary is not None else _build_step_prompt(title, raw_data)
+        prepared.append((title, cache_key, step_summary, prompt))
+
+    # Phase 2 -- the steps are independent (none reads another's output) and
+    # each blocks on LLM I/O, so dispatch the cache misses concurrently: the
+    # batch costs roughly the slowest step instead of the sum of all five.
+    # Plain mode stays sequential because ask_llm streams tokens straight to
+    # stdout there, and concurrent streams would interleave.
+    pending: Dict[str, Any] = {}
+    executor: Optional[ThreadPoolExecutor] = None
+    misses = [(title, prompt) for title, _, summary, prompt in prepared if summary is None]
+    if RICH_AVAILABLE and len(misses) > 1:
+        executor = ThreadPoolExecutor(max_workers=len(misses))
+        for title, prompt in misses:
+            pending[title] = executor.submit(
+                ask_llm, prompt, model,
+                system_message=f"You are a helpful PC diagnostic assistant. Summarize {title} for a health report.")
+
+    # Phase 3 -- collect and display results in the original step order.
+    try:
+        for idx, (title, cache_key, step_summary, prompt) in enumerate(prepared, 1):
+            print_step(f"Stepwise Diagnostic: {title}", f"Running {title}...", idx, total_steps)
+            streamed_live = False
+            if step_summary is None:
+                future = pending.get(title)
+                if future is not None:
+                    step_summary = future.result()
+                else:
+                    step_summary = ask_llm(prompt, model, system_message=f"You are a helpful PC diagnostic assistant. Summarize {title} for a health report.")
+                    # In plain mode the call above echoed the tokens already
+                    streamed_live = not RICH_AVAILABLE
+                if step_summary:
+                    _step_cache_put(step_cache, cache_key, step_summary)
+            if step_summary:
+                # Cache hits were never streamed, so they still need printing
+                # even in plain mode.
+                if not streamed_live:
+                    print_md(f"\n[LLM SUMMARY: {title}]\n" + step_summary)
+                intermediate_summaries.append({"step": title, "summary": step_summary})
+            else:
+                print_warning(f"LLM did not return a summary for {title}.")
+                intermediate_summaries.append({"step": title, "summary": "No summary returned."})
+            # Record each intermediate summary; add_to_memory_list marks the
+            # memory dirty and the debounced writer coalesces the disk I/O,
+            # so there is no per-step full-file rewrite.
+            memory = add_to_memory_list(memory, "health_report_summaries", {"step": title, "summary": step_summary}, max_items=10)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     # Final synthesis step
     print_step("Final Synthesis", "Aggregating all stepwise summaries for a holistic health report.", None, None)
     all_summaries_text = "\n\n".join(f"[{item['step']}]\n{item['summary']}" for item in intermediate_summaries)
-    final_prompt = f"""
-    You are a PC troubleshooting assistant. Here are stepwise health summaries from different diagnostic checks. Synthesize them into a single, holistic health report. Highlight urgent issues, cross-reference findings, and provide clear recommendations.\n\n{all_summaries_text}\n\nRespond in Markdown."
-    """
-    final_report = ask_llm(final_prompt, model, system_message="You are a helpful PC diagnostic assistant. Synthesize all stepwise summaries into a final health report.")
+    final_prompt = _FINAL_SYNTH_PROMPT_TMPL.format(all_summaries_text=all_summaries_text)
+    # The synthesis is fully determined by the summaries that go into its
+    # prompt, so key the cache on those -- not on the step inputs. An
+    # input-derived key would pin a synthesis built from "No summary
+    # returned." placeholders and keep serving it after the LLM recovers;
+    # a summaries-derived key changes as soon as any summary does.
+    final_key = hashlib.sha256(all_summaries_text.encode("utf-8")).hexdigest()
+    final_report = step_cache.get(final_key)
+    final_streamed = False
+    if final_report is None:
+        final_report = ask_llm(final_prompt, model, system_message="You are a helpful PC diagnostic assistant. Synthesize all stepwise summaries into a final health report.")
+        # In plain mode the call above echoed the tokens already
+        final_streamed = not RICH_AVAILABLE
+        if final_report:
+            _step_cache_put(step_cache, final_key, final_report)
     if final_report:
-        print_md("\n[LLM FINAL HEALTH REPORT]\n" + final_report)
+        if not final_streamed:
+            print_md("\n[LLM FINAL HEALTH REPORT]\n" + final_report)
         memory = add_to_memory_list(memory, "health_report_summaries", {"step": "Final Synthesis", "summary": final_report}, max_items=10)
-        save_memory(memory)
     else:
         print_warning("LLM did not return a final health report.")
+    # One guaranteed write for the whole report (step summaries, step cache,
+    # final synthesis) instead of a serialize+fsync per step.
+    flush_memory()
 
 # --- Integrate into main() ---
 def main() -> None:
@@ -2521,7 +3557,7 @@ def main() -> None:
 
     # Load memory
     memory = load_memory()
-    memory["last_session"] = datetime.datetime.now().isoformat()
+    memory["last_session"] = _now_iso()
     save_memory(memory)
 
     # Check if Ollama is available for LLM features
@@ -2532,7 +3568,7 @@ def main() -> None:
         models = list_ollama_models()
         if models:
             model = select_model(models) # Let user select model
-            if model and llm_client: # Check client also initialized
+            if model and get_llm_client(): # Check client also initialized
                 llm_available = True
                 print_success(f"Using model: {model}")
             elif model: